@@ -11,6 +11,7 @@ import logging
 import re
 from collections import defaultdict
 from datetime import datetime, timedelta, date
+from functools import lru_cache
 from pathlib import Path
 from statistics import median, stdev
 from typing import Optional
@@ -65,6 +66,24 @@ def load_subscriptions(filepath: Path = DATA_FILE) -> list[dict]:
     return records
 
 
+@lru_cache(maxsize=8)
+def _load_records_cached(path: str, mtime_ns: int, size: int) -> tuple[dict, ...]:
+    """Parse a JSONL file once per (mtime, size) version of it."""
+    return tuple(load_subscriptions(Path(path)))
+
+
+def load_subscriptions_cached(filepath: Path = DATA_FILE) -> list[dict]:
+    """
+    Like load_subscriptions, but reuses the previous parse while the file is
+    unchanged. The returned records are shared — treat them as read-only.
+    """
+    try:
+        stat = filepath.stat()
+    except FileNotFoundError:
+        return []
+    return list(_load_records_cached(str(filepath), stat.st_mtime_ns, stat.st_size))
+
+
 # ── Frequency detection ───────────────────────────────────────────────────────
 def detect_frequency(dates: list[date]) -> Optional[str]:
     """
@@ -206,6 +225,7 @@ def upcoming_renewals(merchant_summaries: list[dict], days: int = 30) -> list[di
                 "amount": m["avg_amount"],
                 "currency": m["currency"],
                 "renewal_date": m["next_renewal"],
+                "renewal_ordinal": renewal_date.toordinal(),
                 "days_until": days_until,
             })
     upcoming.sort(key=lambda x: x["days_until"])
@@ -213,10 +233,13 @@ def upcoming_renewals(merchant_summaries: list[dict], days: int = 30) -> list[di
 
 
 # ── Main analysis entry point ─────────────────────────────────────────────────
-def run_analysis(filepath: Path = DATA_FILE) -> dict:
+def run_analysis(filepath: Path = DATA_FILE, extra_records: Optional[list[dict]] = None) -> dict:
     """
     Run the full analysis pipeline and return a structured report dict.
 
+    `extra_records` are analyzed alongside the file's contents without being
+    written to it — e.g. a manual entry whose disk write is still pending.
+
     Report structure:
     {
         "generated_at": "...",
@@ -231,7 +254,7 @@ def run_analysis(filepath: Path = DATA_FILE) -> dict:
         "upcoming_renewals_30d": [...],
     }
     """
-    records = load_subscriptions(filepath)
+    records = load_subscriptions_cached(filepath) + list(extra_records or [])
     if not records:
         return {
             "generated_at": datetime.utcnow().isoformat(),
@@ -58,7 +58,7 @@ def load_tokens_from_disk():
 
 def save_tokens_to_disk():
     TOKENS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    TOKENS_FILE.write_text(json.dumps(ACTIVE_TOKENS, indent=2))
+    TOKENS_FILE.write_text(json.dumps(ACTIVE_TOKENS, separators=(",", ":")))
 
 
 class LoginRequest(BaseModel):
@@ -216,7 +216,7 @@ def current_email(request: Request) -> str:
 
 
 # ── Config helpers (per-user) ──────────────────────────────────────────────────
-REMINDER_DAYS = [3, 2, 1]
+REMINDER_DAYS = frozenset((3, 2, 1))
 CURRENCY_SYMBOLS = {"USD": "$", "NGN": "₦", "GBP": "£", "EUR": "€"}
 
 
@@ -257,15 +257,16 @@ def build_scan_summary(report: dict) -> str:
         lines.append("💳 Monthly: *" + " · ".join(
             f"{CURRENCY_SYMBOLS.get(c, c)}{a:,.2f}" for c, a in spend.items()
         ) + "*")
-    for m in report.get("merchants", []):
-        sym = CURRENCY_SYMBOLS.get(m["currency"], m["currency"] + " ")
-        lines.append(f"• {m['merchant']} — {sym}{m['monthly_cost']:,.2f}/mo")
-    renewals = report.get("upcoming_renewals_30d", [])
+    merchants = report.get("merchants", [])
+    renewals  = report.get("upcoming_renewals_30d", [])
+    # One symbol lookup per currency, not per line
+    sym_map = {c: CURRENCY_SYMBOLS.get(c, c + " ") for c in {x["currency"] for x in merchants + renewals}}
+    for m in merchants:
+        lines.append(f"• {m['merchant']} — {sym_map[m['currency']]}{m['monthly_cost']:,.2f}/mo")
     if renewals:
         lines.append("\n*⏰ Upcoming renewals (30 days):*")
         for r in renewals:
-            sym = CURRENCY_SYMBOLS.get(r["currency"], r["currency"] + " ")
-            lines.append(f"• *{r['merchant']}* — {sym}{r['amount']:,.2f} in {r['days_until']}d ({r['renewal_date']})")
+            lines.append(f"• *{r['merchant']}* — {sym_map[r['currency']]}{r['amount']:,.2f} in {r['days_until']}d ({r['renewal_date']})")
     else:
         lines.append("\n✅ No renewals due in the next 30 days")
     return "\n".join(lines)
@@ -282,6 +283,7 @@ def fire_renewal_reminders(report: dict, email: str, tg_token: str, chat_id: str
             sent = json.loads(sent_file.read_text())
         except Exception:
             pass
+    sym_map = {c: CURRENCY_SYMBOLS.get(c, c + " ") for c in {r["currency"] for r in renewals}}
     count = 0
     for r in renewals:
         days = r.get("days_until", 999)
@@ -291,18 +293,17 @@ def fire_renewal_reminders(report: dict, email: str, tg_token: str, chat_id: str
         if key in sent:
             continue
         day_word = "day" if days == 1 else "days"
-        sym = CURRENCY_SYMBOLS.get(r["currency"], r["currency"] + " ")
         msg = (
             f"⏰ *Renewal Reminder — SubTrack*\n\n"
             f"*{r['merchant']}* renews in *{days} {day_word}* ({r['renewal_date']}).\n"
-            f"Amount: *{sym}{r['amount']:,.2f}*\n\n"
+            f"Amount: *{sym_map[r['currency']]}{r['amount']:,.2f}*\n\n"
             f"If you don\u2019t wish to continue, cancel now."
         )
         if send_telegram(tg_token, chat_id, msg):
             sent[key] = today.isoformat()
             count += 1
     if count:
-        sent_file.write_text(json.dumps(sent, indent=2))
+        sent_file.write_text(json.dumps(sent, separators=(",", ":")))
     return count
 
 
@@ -486,7 +487,7 @@ def add_subscription(sub: ManualSubscription, request: Request):
 
     use_date = sub.date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
     record = {
-        "id": hashlib.sha256(f"manual:{sub.merchant}:{sub.amount}:{use_date}".encode()).hexdigest()[:16],
+        "id": hashlib.blake2b(f"manual:{sub.merchant}:{sub.amount}:{use_date}".encode(), digest_size=8).hexdigest(),
         "merchant": sub.merchant.strip(),
         "amount": round(sub.amount, 2),
         "currency": sub.currency,
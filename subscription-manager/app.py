@@ -16,14 +16,32 @@ Design system: Stripe-inspired
 """
 
 import json
+import logging
+import os
 import threading
-import time
 import urllib.parse
-from datetime import date
+from collections import deque
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import streamlit as st
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is the fallback
+    orjson = None
+
+from analyzer import run_analysis
+from notifier import (
+    TelegramClient, alert_key, append_sent_alerts, load_sent_alerts, sent_alerts_lock,
+)
+from parser import run_parser
+
+log = logging.getLogger(__name__)
+
 st.set_page_config(
     page_title="SubTrack — Subscription Manager",
     page_icon="💳",
@@ -483,130 +501,145 @@ for k, v in DEFAULTS.items():
 # ── Alert config ──────────────────────────────────────────────────────────────
 ALERT_CONFIG_FILE = Path("alerts_config.json")
 
-def load_alert_config():
+def read_alert_config_file() -> dict:
     if ALERT_CONFIG_FILE.exists():
         try:
-            cfg = json.loads(ALERT_CONFIG_FILE.read_text())
-            st.session_state.alert_telegram_token   = cfg.get("telegram_token", "")
-            st.session_state.alert_telegram_chat_id = cfg.get("telegram_chat_id", "")
-            st.session_state.alert_whatsapp_number  = cfg.get("whatsapp_number", "")
-            st.session_state.budget_usd = float(cfg.get("budget_usd", 0))
-            st.session_state.budget_ngn = float(cfg.get("budget_ngn", 0))
+            return json.loads(ALERT_CONFIG_FILE.read_text())
         except Exception:
             pass
+    return {}
+
+@st.cache_data(ttl=2, show_spinner=False)
+def read_alert_config() -> dict:
+    """alerts_config.json as read by every rerun; cleared on each app write."""
+    return read_alert_config_file()
+
+def update_alert_config(fields: dict):
+    """
+    Merge `fields` into alerts_config.json. Written to a temp file and swapped
+    in with os.replace, so a concurrent reader (e.g. scheduler.py) never sees
+    a half-written file.
+    """
+    cfg = read_alert_config_file()
+    cfg.update(fields)
+    tmp = ALERT_CONFIG_FILE.with_suffix(f".json.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(cfg, indent=2))
+    os.replace(tmp, ALERT_CONFIG_FILE)
+    read_alert_config.clear()
+
+def load_alert_config():
+    cfg = read_alert_config()
+    if not cfg:
+        return
+    try:
+        st.session_state.alert_telegram_token   = cfg.get("telegram_token", "")
+        st.session_state.alert_telegram_chat_id = cfg.get("telegram_chat_id", "")
+        st.session_state.alert_whatsapp_number  = cfg.get("whatsapp_number", "")
+        st.session_state.budget_usd = float(cfg.get("budget_usd", 0))
+        st.session_state.budget_ngn = float(cfg.get("budget_ngn", 0))
+    except Exception:
+        pass
 
 def save_alert_config(token, chat_id, wa_number):
-    cfg = {}
-    if ALERT_CONFIG_FILE.exists():
-        try:
-            cfg = json.loads(ALERT_CONFIG_FILE.read_text())
-        except Exception:
-            pass
-    cfg.update({"telegram_token": token, "telegram_chat_id": chat_id, "whatsapp_number": wa_number})
-    ALERT_CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
+    update_alert_config({"telegram_token": token, "telegram_chat_id": chat_id, "whatsapp_number": wa_number})
 
 def save_budget(budget_usd: float, budget_ngn: float):
-    cfg = {}
-    if ALERT_CONFIG_FILE.exists():
-        try:
-            cfg = json.loads(ALERT_CONFIG_FILE.read_text())
-        except Exception:
-            pass
-    cfg.update({"budget_usd": budget_usd, "budget_ngn": budget_ngn})
-    ALERT_CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
+    update_alert_config({"budget_usd": budget_usd, "budget_ngn": budget_ngn})
+
+@st.cache_resource
+def telegram_client() -> TelegramClient:
+    """One keep-alive connection pool per process, shared by every rerun and thread."""
+    return TelegramClient()
 
 def send_telegram_message(token, chat_id, text):
-    try:
-        import urllib.request
-        token = token.strip(); chat_id = chat_id.strip()
-        url = f"https://api.telegram.org/bot{token}/sendMessage"
-        payload = json.dumps({"chat_id": chat_id, "text": text, "parse_mode": "Markdown"}).encode()
-        req = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            result = json.loads(resp.read())
-            return (True, "") if result.get("ok") else (False, result.get("description", "Unknown error"))
-    except Exception as exc:
-        return False, str(exc)
+    return telegram_client().send_message(token, chat_id, text)
 
 def save_credentials(email, password):
     """Persist Gmail credentials to alerts_config.json."""
-    cfg = {}
-    if ALERT_CONFIG_FILE.exists():
-        try:
-            cfg = json.loads(ALERT_CONFIG_FILE.read_text())
-        except Exception:
-            pass
-    cfg["email_addr"]   = email
-    cfg["app_password"] = password
-    ALERT_CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
+    update_alert_config({"email_addr": email, "app_password": password})
 
 def load_saved_credentials():
     """Auto-fill Gmail credentials from alerts_config.json if not already set."""
-    if ALERT_CONFIG_FILE.exists():
-        try:
-            cfg = json.loads(ALERT_CONFIG_FILE.read_text())
-            if cfg.get("email_addr") and not st.session_state.email_addr:
-                st.session_state.email_addr   = cfg["email_addr"]
-            if cfg.get("app_password") and not st.session_state.app_password:
-                st.session_state.app_password = cfg["app_password"]
-        except Exception:
-            pass
+    cfg = read_alert_config()
+    if cfg.get("email_addr") and not st.session_state.email_addr:
+        st.session_state.email_addr   = cfg["email_addr"]
+    if cfg.get("app_password") and not st.session_state.app_password:
+        st.session_state.app_password = cfg["app_password"]
 
 
 # ── Renewal reminder deduplication ────────────────────────────────────────────
-SENT_ALERTS_FILE = Path("sent_alerts.json")
-REMINDER_DAYS    = [3, 2, 1]
-
-def load_sent_alerts() -> dict:
-    if SENT_ALERTS_FILE.exists():
-        try:
-            return json.loads(SENT_ALERTS_FILE.read_text())
-        except Exception:
-            pass
-    return {}
+SENT_ALERTS_FILE = Path("sent_alerts.jsonl")
+REMINDER_DAYS    = frozenset((3, 2, 1))
 
-def save_sent_alerts(sent: dict):
-    SENT_ALERTS_FILE.write_text(json.dumps(sent, indent=2))
-
-def check_and_send_renewal_reminders(report: dict) -> int:
+def check_and_send_renewal_reminders(report: dict, tg_token: str, tg_chat_id: str) -> int:
     """
     Send Telegram reminders for renewals exactly 1, 2, or 3 days away.
-    Skips alerts already sent (tracked in sent_alerts.json).
+    Skips alerts already sent (tracked in sent_alerts.jsonl).
     Returns the number of new alerts sent.
     """
-    tg_token   = st.session_state.alert_telegram_token.strip()
-    tg_chat_id = st.session_state.alert_telegram_chat_id.strip()
+    tg_token   = tg_token.strip()
+    tg_chat_id = tg_chat_id.strip()
     if not tg_token or not tg_chat_id:
         return 0
 
     renewals = report.get("upcoming_renewals_30d", [])
     today    = date.today()
-    sent     = load_sent_alerts()
-    count    = 0
-
-    for r in renewals:
-        days_until = r.get("days_until", 999)
-        if days_until not in REMINDER_DAYS:
-            continue
-        alert_key = f"{r['renewal_date']}_{r['merchant']}_{days_until}"
-        if alert_key in sent:
-            continue
-        day_word = "day" if days_until == 1 else "days"
-        msg = (
-            f"\u23f0 *Renewal Reminder \u2014 SubTrack*\n\n"
-            f"*{r['merchant']}* renews in *{days_until} {day_word}* "
-            f"({r['renewal_date']}).\n"
-            f"Amount: *{r['currency']} {r['amount']:,.2f}*\n\n"
-            f"If you don\u2019t wish to continue, cancel now."
-        )
-        ok, _ = send_telegram_message(tg_token, tg_chat_id, msg)
-        if ok:
-            sent[alert_key] = today.isoformat()
-            count += 1
+    with sent_alerts_lock(SENT_ALERTS_FILE):
+        sent = load_sent_alerts(SENT_ALERTS_FILE, keep_days=max(REMINDER_DAYS) + 1)
+        due: list[tuple[int, str]] = []
 
-    if count:
-        save_sent_alerts(sent)
-    return count
+        for r in renewals:
+            days_until = r.get("days_until", 999)
+            if days_until not in REMINDER_DAYS:
+                continue
+            key = alert_key(r.get("renewal_ordinal", r["renewal_date"]), r["merchant"], days_until)
+            if key in sent:
+                continue
+            day_word = "day" if days_until == 1 else "days"
+            msg = (
+                f"\u23f0 *Renewal Reminder \u2014 SubTrack*\n\n"
+                f"*{r['merchant']}* renews in *{days_until} {day_word}* "
+                f"({r['renewal_date']}).\n"
+                f"Amount: *{r['currency']} {r['amount']:,.2f}*\n\n"
+                f"If you don\u2019t wish to continue, cancel now."
+            )
+            due.append((key, msg))
+
+        # Sent concurrently over the pooled connections, not one round-trip at a time
+        results = telegram_client().send_many(tg_token, tg_chat_id, [msg for _, msg in due])
+        new_keys = {key: today.isoformat() for (key, _), (ok, _) in zip(due, results) if ok}
+        append_sent_alerts(SENT_ALERTS_FILE, new_keys)
+    return len(new_keys)
+
+
+REMINDER_HOUR = 9  # local time of the daily reminder check
+
+def reminder_loop(wake: threading.Event):
+    """
+    Check reminders against the latest data now, then daily at REMINDER_HOUR
+    or whenever `wake` is set (e.g. right after a scan finishes).
+    """
+    while True:
+        try:
+            cfg = read_alert_config()
+            check_and_send_renewal_reminders(
+                run_analysis(), cfg.get("telegram_token", ""), cfg.get("telegram_chat_id", "")
+            )
+        except Exception:
+            log.exception("Background reminder check failed")
+        now = datetime.now()
+        next_run = now.replace(hour=REMINDER_HOUR, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        wake.wait(timeout=(next_run - now).total_seconds())
+        wake.clear()
+
+@st.cache_resource
+def reminder_wake() -> threading.Event:
+    """Start the process-wide reminder thread once; set the event to trigger a check."""
+    wake = threading.Event()
+    threading.Thread(target=reminder_loop, args=(wake,), daemon=True).start()
+    return wake
 
 
 def build_renewal_alert_text(report):
@@ -632,9 +665,26 @@ def build_renewal_alert_text(report):
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def plotly_go():
+    """Import plotly once per server process, and only when a chart is drawn."""
+    import plotly.graph_objects as go
+    return go
+
 def go_to(step):
     st.session_state.step = step
 
+SCAN_LOG_LINES = 30
+
+def new_scan_state() -> dict:
+    """Fresh scan state; the log is a ring buffer so long scans stay O(1) in memory."""
+    return {
+        "progress": 0, "total": 1, "logs": deque(maxlen=SCAN_LOG_LINES),
+        "done": False, "error": None, "report": None,
+        "started": False, "cancelled": False,
+        "event": threading.Event(),  # set by the scan thread when there is news to render
+    }
+
 def render_step_bar(current):
     labels = ["1 · Connect", "2 · Scanning", "3 · Results", "4 · Actions"]
     html = '<div class="step-bar">'
@@ -727,6 +777,7 @@ MERCHANT_DOMAINS = {
     "protonmail": "proton.me", "fastmail": "fastmail.com",
 }
 
+@lru_cache(maxsize=1024)
 def get_merchant_favicon(merchant: str) -> str:
     """Return Google-favicon URL for the closest known domain, or '' if unknown."""
     lower = merchant.lower()
@@ -739,6 +790,7 @@ def get_merchant_favicon(merchant: str) -> str:
         return f"https://www.google.com/s2/favicons?domain={best_domain}&sz=64"
     return ""
 
+@lru_cache(maxsize=2048)
 def sub_icon_html(merchant: str, fallback_emoji: str) -> str:
     """Return the <div class='sub-icon'> block, with brand logo or emoji fallback."""
     favicon = get_merchant_favicon(merchant)
@@ -840,6 +892,14 @@ def get_cancellation_link(merchant: str) -> str:
     return best_url
 
 
+# ── Manual entries ────────────────────────────────────────────────────────────
+def append_record(record: dict):
+    """Append one subscription record to subscriptions.jsonl."""
+    line = orjson.dumps(record) if orjson is not None else json.dumps(record).encode()
+    with Path("subscriptions.jsonl").open("ab") as f:
+        f.write(line + b"\n")
+
+
 # ── Dialogs (modals) ──────────────────────────────────────────────────────────
 @st.dialog("➕ Add Subscription Manually", width="large")
 def dialog_add_subscription():
@@ -848,45 +908,50 @@ def dialog_add_subscription():
         "Add subscriptions not in email — gym, bank debits, Apple Pay, etc.</p>",
         unsafe_allow_html=True,
     )
-    mc1, mc2 = st.columns(2)
-    with mc1:
-        manual_merchant = st.text_input("Service name", placeholder="e.g. Gym membership")
-        manual_amount   = st.number_input("Amount", min_value=0.01, value=9.99, step=0.01, format="%.2f")
-    with mc2:
-        manual_currency = st.selectbox("Currency", ["USD", "NGN", "GBP", "EUR"])
-        manual_freq     = st.selectbox("Billing cycle", ["monthly", "yearly", "quarterly"])
-    manual_date = st.date_input("Start / last billing date", value=date.today())
-
-    save_col, cancel_col = st.columns(2)
-    with save_col:
-        if st.button("Add Subscription", type="primary", use_container_width=True):
-            if not manual_merchant.strip():
-                st.error("Please enter a service name.")
-            else:
-                import hashlib as _hl
-                from datetime import datetime as _dt, timezone as _tz
-                record = {
-                    "id":                _hl.sha256(f"manual:{manual_merchant}:{manual_amount}:{manual_date}".encode()).hexdigest()[:16],
-                    "merchant":          manual_merchant.strip(),
-                    "amount":            round(float(manual_amount), 2),
-                    "currency":          manual_currency,
-                    "date":              manual_date.isoformat(),
-                    "subject":           f"Manual entry: {manual_merchant.strip()}",
-                    "source_email":      "manual",
-                    "detected_keywords": [],
-                    "status":            "active",
-                    "source":            "manual",
-                    "frequency_override": manual_freq,
-                    "parsed_at":         _dt.now(_tz.utc).isoformat(),
-                }
-                with Path("subscriptions.jsonl").open("a") as _f:
-                    _f.write(json.dumps(record) + "\n")
-                from analyzer import run_analysis
-                st.session_state.report = run_analysis()
-                st.success(f"Added **{manual_merchant.strip()}** ({manual_currency} {manual_amount:,.2f}/{manual_freq}).")
-                st.rerun()
-    with cancel_col:
-        if st.button("Cancel", type="secondary", use_container_width=True):
+    with st.form("add_subscription_form"):
+        mc1, mc2 = st.columns(2)
+        with mc1:
+            manual_merchant = st.text_input("Service name", placeholder="e.g. Gym membership")
+            manual_amount   = st.number_input("Amount", min_value=0.01, value=9.99, step=0.01, format="%.2f")
+        with mc2:
+            manual_currency = st.selectbox("Currency", ["USD", "NGN", "GBP", "EUR"])
+            manual_freq     = st.selectbox("Billing cycle", ["monthly", "yearly", "quarterly"])
+        manual_date = st.date_input("Start / last billing date", value=date.today())
+
+        save_col, cancel_col = st.columns(2)
+        with save_col:
+            submitted = st.form_submit_button("Add Subscription", type="primary", use_container_width=True)
+        with cancel_col:
+            cancelled = st.form_submit_button("Cancel", type="secondary", use_container_width=True)
+
+    if cancelled:
+        st.rerun()
+    if submitted:
+        if not manual_merchant.strip():
+            st.error("Please enter a service name.")
+        else:
+            import hashlib as _hl
+            from datetime import datetime as _dt, timezone as _tz
+            record = {
+                "id":                _hl.blake2b(f"manual:{manual_merchant}:{manual_amount}:{manual_date}".encode(), digest_size=8).hexdigest(),
+                "merchant":          manual_merchant.strip(),
+                "amount":            round(float(manual_amount), 2),
+                "currency":          manual_currency,
+                "date":              manual_date.isoformat(),
+                "subject":           f"Manual entry: {manual_merchant.strip()}",
+                "source_email":      "manual",
+                "detected_keywords": [],
+                "status":            "active",
+                "source":            "manual",
+                "frequency_override": manual_freq,
+                "parsed_at":         _dt.now(_tz.utc).isoformat(),
+            }
+            # Analyze the new entry in memory, then flush it to disk off-thread.
+            # The write starts only after run_analysis has read the file, so the
+            # record is never counted twice.
+            st.session_state.report = run_analysis(extra_records=[record])
+            threading.Thread(target=append_record, args=(record,), daemon=True).start()
+            st.success(f"Added **{manual_merchant.strip()}** ({manual_currency} {manual_amount:,.2f}/{manual_freq}).")
             st.rerun()
 
 
@@ -897,34 +962,53 @@ def dialog_budget():
         "Get a warning when your total monthly spend exceeds these limits.</p>",
         unsafe_allow_html=True,
     )
-    b_usd = st.number_input("USD limit ($/mo)",  min_value=0.0, value=float(st.session_state.budget_usd), step=5.0,    format="%.2f")
-    b_ngn = st.number_input("NGN limit (₦/mo)",  min_value=0.0, value=float(st.session_state.budget_ngn), step=1000.0, format="%.2f")
-    st.markdown('<p style="color:#8898aa;font-size:0.76rem;">Set to 0 to disable a limit.</p>', unsafe_allow_html=True)
-
-    save_col, cancel_col = st.columns(2)
-    with save_col:
-        if st.button("Save Budget", type="primary", use_container_width=True):
-            st.session_state.budget_usd = b_usd
-            st.session_state.budget_ngn = b_ngn
-            save_budget(b_usd, b_ngn)
-            report = st.session_state.report or {}
-            spend  = report.get("spend_by_currency", {})
-            tg_tok = st.session_state.alert_telegram_token.strip()
-            tg_cid = st.session_state.alert_telegram_chat_id.strip()
-            if b_usd and spend.get("USD", 0) > b_usd and tg_tok and tg_cid:
-                send_telegram_message(tg_tok, tg_cid,
-                    f"⚠️ *Over USD budget!* ${spend['USD']:,.2f}/mo vs ${b_usd:,.2f} limit.")
-            if b_ngn and spend.get("NGN", 0) > b_ngn and tg_tok and tg_cid:
-                send_telegram_message(tg_tok, tg_cid,
-                    f"⚠️ *Over NGN budget!* ₦{spend['NGN']:,.2f}/mo vs ₦{b_ngn:,.2f} limit.")
-            st.success("Budget saved.")
-            st.rerun()
-    with cancel_col:
-        if st.button("Cancel", type="secondary", use_container_width=True):
-            st.rerun()
+    with st.form("budget_form"):
+        b_usd = st.number_input("USD limit ($/mo)",  min_value=0.0, value=float(st.session_state.budget_usd), step=5.0,    format="%.2f")
+        b_ngn = st.number_input("NGN limit (₦/mo)",  min_value=0.0, value=float(st.session_state.budget_ngn), step=1000.0, format="%.2f")
+        st.markdown('<p style="color:#8898aa;font-size:0.76rem;">Set to 0 to disable a limit.</p>', unsafe_allow_html=True)
+
+        save_col, cancel_col = st.columns(2)
+        with save_col:
+            submitted = st.form_submit_button("Save Budget", type="primary", use_container_width=True)
+        with cancel_col:
+            cancelled = st.form_submit_button("Cancel", type="secondary", use_container_width=True)
+
+    if cancelled:
+        st.rerun()
+    if submitted:
+        st.session_state.budget_usd = b_usd
+        st.session_state.budget_ngn = b_ngn
+        save_budget(b_usd, b_ngn)
+        report = st.session_state.report or {}
+        spend  = report.get("spend_by_currency", {})
+        tg_tok = st.session_state.alert_telegram_token.strip()
+        tg_cid = st.session_state.alert_telegram_chat_id.strip()
+        # One message for both limits — a single round-trip to Telegram
+        over_msgs = []
+        if b_usd and spend.get("USD", 0) > b_usd:
+            over_msgs.append(f"⚠️ *Over USD budget!* ${spend['USD']:,.2f}/mo vs ${b_usd:,.2f} limit.")
+        if b_ngn and spend.get("NGN", 0) > b_ngn:
+            over_msgs.append(f"⚠️ *Over NGN budget!* ₦{spend['NGN']:,.2f}/mo vs ₦{b_ngn:,.2f} limit.")
+        if over_msgs and tg_tok and tg_cid:
+            send_telegram_message(tg_tok, tg_cid, "\n".join(over_msgs))
+        st.success("Budget saved.")
+        st.rerun()
 
 
 # ── STEP 1: Connect ───────────────────────────────────────────────────────────
+# Static blocks go through st.html, which skips the markdown pass st.markdown
+# runs over every HTML string on each rerun.
+CONNECT_INFO_HTML = (
+    '<div class="info-grid">'
+    '<div class="info-card"><div class="info-icon">🔒</div>'
+    '<div class="info-title">Read-only access</div>'
+    '<div class="info-desc">We never send, delete, or modify your emails.</div></div>'
+    '<div class="info-card"><div class="info-icon">💾</div>'
+    '<div class="info-title">Stays on your machine</div>'
+    '<div class="info-desc">Results saved locally in subscriptions.jsonl.</div></div>'
+    '</div>'
+)
+
 def render_connect():
     st.markdown(
         '<div class="card">'
@@ -952,27 +1036,13 @@ def render_connect():
             st.session_state.email_addr   = email_val
             st.session_state.app_password = password_val
             save_credentials(email_val, password_val)
-            st.session_state.scan = {
-                "progress": 0, "total": 1, "logs": [],
-                "done": False, "error": None, "report": None,
-                "started": False, "cancelled": False,
-            }
+            st.session_state.scan = new_scan_state()
             go_to(2)
             st.rerun()
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-    st.markdown(
-        '<div class="info-grid">'
-        '<div class="info-card"><div class="info-icon">🔒</div>'
-        '<div class="info-title">Read-only access</div>'
-        '<div class="info-desc">We never send, delete, or modify your emails.</div></div>'
-        '<div class="info-card"><div class="info-icon">💾</div>'
-        '<div class="info-title">Stays on your machine</div>'
-        '<div class="info-desc">Results saved locally in subscriptions.jsonl.</div></div>'
-        '</div>',
-        unsafe_allow_html=True,
-    )
+    st.html(CONNECT_INFO_HTML)
 
     st.markdown("<div style='margin-top:1.25rem;'></div>", unsafe_allow_html=True)
     if st.button("➕ Add subscription manually", type="secondary", use_container_width=True, key="btn_add_manual_connect"):
@@ -981,8 +1051,6 @@ def render_connect():
 
 # ── STEP 2: Scanning ──────────────────────────────────────────────────────────
 def render_scanning():
-    from parser import run_parser
-
     email_addr   = st.session_state.get("email_addr", "")
     app_password = st.session_state.get("app_password", "")
 
@@ -993,11 +1061,7 @@ def render_scanning():
         return
 
     if "scan" not in st.session_state:
-        st.session_state.scan = {
-            "progress": 0, "total": 1, "logs": [],
-            "done": False, "error": None, "report": None,
-            "started": False, "cancelled": False,
-        }
+        st.session_state.scan = new_scan_state()
     scan = st.session_state.scan
 
     def progress_cb(current, total, record):
@@ -1008,13 +1072,15 @@ def render_scanning():
         currency = record.get("currency", "USD")
         amt_str  = f"{currency} {amount:,.2f}" if amount else "—"
         scan["logs"].append(f"✔  {merchant}  ·  {amt_str}  ·  {record.get('date','')}")
+        scan["event"].set()
         if scan["cancelled"]:
             raise InterruptedError("Scan cancelled.")
 
     def do_scan():
         try:
+            # Repeat scans are incremental: run_parser only fetches mail above
+            # the UID watermark left by the previous complete scan
             run_parser(email_addr, app_password, progress_callback=progress_cb)
-            from analyzer import run_analysis
             scan["report"] = run_analysis()
         except InterruptedError:
             scan["logs"].append("⚠  Scan cancelled by user.")
@@ -1022,6 +1088,7 @@ def render_scanning():
             scan["error"] = str(exc)
         finally:
             scan["done"] = True
+            scan["event"].set()
 
     if not scan["started"]:
         scan["started"] = True
@@ -1049,7 +1116,7 @@ def render_scanning():
             )
         log_html = (
             '<div class="log-box">'
-            + ("<br>".join(scan["logs"][-30:]) or '<span style="color:#8898aa;">Connecting to Gmail…</span>')
+            + ("<br>".join(scan["logs"]) or '<span style="color:#8898aa;">Connecting to Gmail…</span>')
             + "</div>"
         )
         log_placeholder.markdown(log_html, unsafe_allow_html=True)
@@ -1063,7 +1130,10 @@ def render_scanning():
         with cancel_col:
             if st.button("Cancel scan", key="btn_cancel_scan"):
                 scan["cancelled"] = True
-        time.sleep(0.5)
+        # Rerun as soon as the scan thread reports progress (or finishes),
+        # rather than on a fixed 500 ms tick while IMAP is slow to answer.
+        scan["event"].wait(timeout=2.0)
+        scan["event"].clear()
         st.rerun()
         return
 
@@ -1076,6 +1146,9 @@ def render_scanning():
 
     if scan["report"]:
         st.session_state.report = scan["report"]
+        if not scan.get("reminders_woken"):
+            scan["reminders_woken"] = True
+            reminder_wake().set()
 
     load_alert_config()
     tg_token   = st.session_state.alert_telegram_token.strip()
@@ -1097,7 +1170,7 @@ def render_scanning():
             '</div>',
             unsafe_allow_html=True,
         )
-    log_html = '<div class="log-box">' + "<br>".join(scan["logs"][-30:]) + "</div>"
+    log_html = '<div class="log-box">' + "<br>".join(scan["logs"]) + "</div>"
     log_placeholder.markdown(log_html, unsafe_allow_html=True)
 
     report = st.session_state.report or {}
@@ -1110,6 +1183,31 @@ def render_scanning():
 
 
 # ── STEP 3: Results ───────────────────────────────────────────────────────────
+CHART_COLORS = [
+    "#635bff","#2dce89","#fb6340","#f5365c","#11cdef",
+    "#ffd600","#8898aa","#344675","#adb5bd","#0c6dfd",
+]
+
+STAT_GRID_HTML = """
+<div class="stat-grid">
+  <div class="stat-card">
+    <div class="stat-label">Monthly spend</div>
+    <div class="stat-value purple" style="font-size:1.3rem;">{monthly_str}</div>
+    <div class="stat-sub">{yearly_str} / yr</div>
+  </div>
+  <div class="stat-card green">
+    <div class="stat-label">Potential savings</div>
+    <div class="stat-value green">${savings:,.2f}<span style="font-size:0.85rem;font-weight:500">/mo</span></div>
+    <div class="stat-sub">from duplicate services</div>
+  </div>
+  <div class="stat-card orange">
+    <div class="stat-label">Renewals · 30 days</div>
+    <div class="stat-value orange">{renewals_30d}</div>
+    <div class="stat-sub">upcoming charges</div>
+  </div>
+</div>
+"""
+
 def render_results():
     report = st.session_state.report
     if not report:
@@ -1123,7 +1221,8 @@ def render_results():
     renewals_30d = len(report.get("upcoming_renewals_30d", []))
 
     monthly_str = " · ".join(fmt(c, a) for c, a in spend_by_currency.items()) if spend_by_currency else "$0.00"
-    yearly_str  = " · ".join(fmt(c, round(a*12,2)) for c, a in spend_by_currency.items()) if spend_by_currency else "$0.00"
+    yearly      = np.fromiter(spend_by_currency.values(), dtype=np.float64, count=len(spend_by_currency)) * 12
+    yearly_str  = " · ".join(fmt(c, a) for c, a in zip(spend_by_currency, yearly.round(2).tolist())) if spend_by_currency else "$0.00"
 
     # ── Top navigation ─────────────────────────────────────────────────────
     st.markdown('<div class="nav-row">', unsafe_allow_html=True)
@@ -1145,25 +1244,10 @@ def render_results():
     st.markdown("<div style='margin-bottom:0.5rem;'></div>", unsafe_allow_html=True)
 
     # ── Stat cards ─────────────────────────────────────────────────────────
-    st.markdown(f"""
-<div class="stat-grid">
-  <div class="stat-card">
-    <div class="stat-label">Monthly spend</div>
-    <div class="stat-value purple" style="font-size:1.3rem;">{monthly_str}</div>
-    <div class="stat-sub">{yearly_str} / yr</div>
-  </div>
-  <div class="stat-card green">
-    <div class="stat-label">Potential savings</div>
-    <div class="stat-value green">${savings:,.2f}<span style="font-size:0.85rem;font-weight:500">/mo</span></div>
-    <div class="stat-sub">from duplicate services</div>
-  </div>
-  <div class="stat-card orange">
-    <div class="stat-label">Renewals · 30 days</div>
-    <div class="stat-value orange">{renewals_30d}</div>
-    <div class="stat-sub">upcoming charges</div>
-  </div>
-</div>
-""", unsafe_allow_html=True)
+    st.html(STAT_GRID_HTML.format(
+        monthly_str=monthly_str, yearly_str=yearly_str,
+        savings=savings, renewals_30d=renewals_30d,
+    ))
 
     # ── Budget warning ─────────────────────────────────────────────────────
     budget_usd = st.session_state.get("budget_usd", 0) or 0
@@ -1197,7 +1281,7 @@ def render_results():
     monthly_trend      = report.get("monthly_trend", {})
     category_breakdown = report.get("category_breakdown", [])
     if monthly_trend or category_breakdown:
-        import plotly.graph_objects as go
+        go = plotly_go()
         st.markdown('<div class="section-header">📈 Spending Analytics</div>', unsafe_allow_html=True)
         ch_left, ch_right = st.columns([3, 2])
 
@@ -1210,9 +1294,9 @@ def render_results():
                 )
                 sym = CURRENCY_SYMBOLS.get(currency_label, currency_label + " ")
                 months  = [t["month"] for t in trend_data]
-                amounts = [t["amount"] for t in trend_data]
+                amounts = np.fromiter((t["amount"] for t in trend_data), dtype=np.float64, count=len(trend_data))
                 fig = go.Figure(go.Bar(
-                    x=months, y=amounts,
+                    x=months, y=amounts.tolist(),
                     marker_color="#635bff",
                     hovertemplate=f"<b>%{{x}}</b><br>{sym}%{{y:,.2f}}<extra></extra>",
                 ))
@@ -1232,10 +1316,6 @@ def render_results():
             cats = [c["category"] for c in category_breakdown if c["monthly_cost"] > 0]
             vals = [c["monthly_cost"] for c in category_breakdown if c["monthly_cost"] > 0]
             if cats:
-                CHART_COLORS = [
-                    "#635bff","#2dce89","#fb6340","#f5365c","#11cdef",
-                    "#ffd600","#8898aa","#344675","#adb5bd","#0c6dfd",
-                ]
                 fig2 = go.Figure(go.Pie(
                     labels=cats, values=vals, hole=0.58,
                     marker=dict(colors=CHART_COLORS[:len(cats)], line=dict(color="#ffffff", width=2)),
@@ -1321,13 +1401,34 @@ def render_results():
   </div>
 </div>
 """, unsafe_allow_html=True)
-        checked = st.checkbox(
-            f"Mark {m['merchant']} for cancellation",
-            key=f"cancel_{m['merchant']}",
-            value=(m["merchant"] in st.session_state.marked_cancellation),
+
+    # One editable table instead of a checkbox widget per merchant
+    if merchants:
+        st.markdown('<p style="color:#8898aa;font-size:0.83rem;margin:0.75rem 0 0.5rem;">Tick the services you want to cancel.</p>', unsafe_allow_html=True)
+        marked = st.session_state.marked_cancellation
+        cancel_df = pd.DataFrame([
+            {
+                "merchant": m["merchant"],
+                "category": m["category"],
+                "monthly":  fmt(m["currency"], m["monthly_cost"]),
+                "cancel":   m["merchant"] in marked,
+            }
+            for m in merchants
+        ])
+        edited = st.data_editor(
+            cancel_df,
+            key="cancel_editor",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["merchant", "category", "monthly"],
+            column_config={
+                "merchant": st.column_config.TextColumn("Service"),
+                "category": st.column_config.TextColumn("Category"),
+                "monthly":  st.column_config.TextColumn("Monthly"),
+                "cancel":   st.column_config.CheckboxColumn("Cancel?"),
+            },
         )
-        if checked: st.session_state.marked_cancellation.add(m["merchant"])
-        else:        st.session_state.marked_cancellation.discard(m["merchant"])
+        st.session_state.marked_cancellation = set(edited.loc[edited["cancel"], "merchant"])
 
     # ── Forgotten ──────────────────────────────────────────────────────────
     forgotten = report.get("forgotten_subscriptions", [])
@@ -1378,6 +1479,41 @@ def render_results():
 
 
 # ── STEP 4: Actions ───────────────────────────────────────────────────────────
+@st.cache_data(show_spinner=False)
+def report_json(generated_at: str, _report: dict) -> bytes:
+    """Serialize the audit report once per generated report, not on every rerun."""
+    if orjson is not None:
+        return orjson.dumps(_report, option=orjson.OPT_INDENT_2)
+    return json.dumps(_report, indent=2).encode()
+
+@st.cache_data(show_spinner=False)
+def reminder_checklist(generated_at: str, today: str, _renewals: list) -> str:
+    """Plain-text renewal checklist, rebuilt only when the report or the day changes."""
+    header = f"# Upcoming renewals — next 30 days\n# Generated: {today}\n\n"
+    return header + "\n".join(
+        f"[ ] {r['renewal_date']}  {r['merchant']:30s}  {r['currency']} {r['amount']:,.2f}  (in {r['days_until']}d)"
+        for r in _renewals
+    )
+
+@st.cache_data(show_spinner=False)
+def make_plist(label: str, extra_arg: str, hour: int, python: str, script: str, workdir: str, log_path: str) -> str:
+    """launchd plist running scheduler.py daily at `hour`."""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
+<plist version="1.0"><dict>
+  <key>Label</key><string>{label}</string>
+  <key>ProgramArguments</key><array>
+    <string>{python}</string><string>{script}</string><string>{extra_arg}</string>
+  </array>
+  <key>StartCalendarInterval</key><dict>
+    <key>Hour</key><integer>{hour}</integer><key>Minute</key><integer>0</integer>
+  </dict>
+  <key>WorkingDirectory</key><string>{workdir}</string>
+  <key>StandardOutPath</key><string>{log_path}</string>
+  <key>StandardErrorPath</key><string>{log_path}</string>
+  <key>RunAtLoad</key><false/>
+</dict></plist>"""
+
 def render_actions():
     report = st.session_state.report or {}
     marked = list(st.session_state.marked_cancellation)
@@ -1388,7 +1524,7 @@ def render_actions():
     st.markdown('<div class="section-header">📄 Audit Report</div>', unsafe_allow_html=True)
     st.download_button(
         label="Download report.json",
-        data=json.dumps(report, indent=2),
+        data=report_json(report.get("generated_at", ""), report),
         file_name="subscription_audit.json",
         mime="application/json",
         key="dl_json",
@@ -1437,10 +1573,7 @@ def render_actions():
     st.markdown('<div class="section-header">🔔 Reminder Checklist</div>', unsafe_allow_html=True)
     renewals = report.get("upcoming_renewals_30d", [])
     if renewals:
-        lines = [f"# Upcoming renewals — next 30 days", f"# Generated: {date.today().isoformat()}", ""]
-        for r in renewals:
-            lines.append(f"[ ] {r['renewal_date']}  {r['merchant']:30s}  {r['currency']} {r['amount']:,.2f}  (in {r['days_until']}d)")
-        reminder_text = "\n".join(lines)
+        reminder_text = reminder_checklist(report.get("generated_at", ""), date.today().isoformat(), renewals)
         st.code(reminder_text, language="text")
         st.download_button("Download renewals.txt", reminder_text, "upcoming_renewals.txt", "text/plain", key="dl_renewals")
     else:
@@ -1542,10 +1675,7 @@ def render_actions():
         '• <b>Daily reminders</b> — checks every morning and sends an alert on the 3rd, 2nd and 1st day before each renewal</p>',
         unsafe_allow_html=True,
     )
-    _cfg = {}
-    if ALERT_CONFIG_FILE.exists():
-        try: _cfg = json.loads(ALERT_CONFIG_FILE.read_text())
-        except: pass
+    _cfg         = read_alert_config()
     last_scan    = _cfg.get("last_scan", "Never")
     _base        = Path(__file__).parent.resolve()
     _py          = str(_base / ".venv" / "bin" / "python")
@@ -1557,23 +1687,6 @@ def render_actions():
     _weekly_path = Path.home() / "Library" / "LaunchAgents" / f"{_weekly_lbl}.plist"
     _remind_path = Path.home() / "Library" / "LaunchAgents" / f"{_remind_lbl}.plist"
 
-    def _make_plist(label, extra_arg, hour):
-        return f"""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0"><dict>
-  <key>Label</key><string>{label}</string>
-  <key>ProgramArguments</key><array>
-    <string>{_py}</string><string>{_sched}</string><string>{extra_arg}</string>
-  </array>
-  <key>StartCalendarInterval</key><dict>
-    <key>Hour</key><integer>{hour}</integer><key>Minute</key><integer>0</integer>
-  </dict>
-  <key>WorkingDirectory</key><string>{_wdir}</string>
-  <key>StandardOutPath</key><string>{_log}</string>
-  <key>StandardErrorPath</key><string>{_log}</string>
-  <key>RunAtLoad</key><false/>
-</dict></plist>"""
-
     weekly_status = "✅ Installed" if _weekly_path.exists() else "Not installed"
     remind_status = "✅ Installed" if _remind_path.exists() else "Not installed"
     st.markdown(f"""
@@ -1602,14 +1715,14 @@ def render_actions():
         )
         dl1, dl2 = st.columns(2)
         with dl1:
-            st.download_button("⬇ Weekly scan plist",     _make_plist(_weekly_lbl, "--once",    8), f"{_weekly_lbl}.plist",  "application/xml", key="dl_weekly_plist")
+            st.download_button("⬇ Weekly scan plist",     make_plist(_weekly_lbl, "--once",    8, _py, _sched, _wdir, _log), f"{_weekly_lbl}.plist",  "application/xml", key="dl_weekly_plist")
         with dl2:
-            st.download_button("⬇ Daily reminders plist", _make_plist(_remind_lbl, "--remind",  9), f"{_remind_lbl}.plist",  "application/xml", key="dl_remind_plist")
+            st.download_button("⬇ Daily reminders plist", make_plist(_remind_lbl, "--remind-once", 9, _py, _sched, _wdir, _log), f"{_remind_lbl}.plist",  "application/xml", key="dl_remind_plist")
         st.markdown(
             '<div class="alert-steps" style="margin-top:0.5rem;">'
             'Run manually from Terminal anytime:<br>'
             '<code>python scheduler.py --once</code> &nbsp;(full scan)<br>'
-            '<code>python scheduler.py --remind</code> &nbsp;(reminders only)'
+            '<code>python scheduler.py --remind-once</code> &nbsp;(reminders only)'
             '</div>',
             unsafe_allow_html=True,
         )
@@ -1624,11 +1737,8 @@ def render_actions():
 load_saved_credentials()
 load_alert_config()
 
-# Fire 1/2/3-day renewal reminders if a report is already available
-if st.session_state.report:
-    n = check_and_send_renewal_reminders(st.session_state.report)
-    if n:
-        st.toast(f"Sent {n} renewal reminder{'s' if n != 1 else ''} via Telegram!", icon="⏰")
+# 1/2/3-day renewal reminders run on a background thread, started once per process
+reminder_wake()
 
 render_header()
 render_step_bar(st.session_state.step)
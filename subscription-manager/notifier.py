@@ -0,0 +1,260 @@
+"""
+notifier.py — Telegram Bot API client
+
+Sends messages through a small pool of keep-alive HTTPS connections to
+api.telegram.org, so consecutive sends (e.g. a batch of renewal reminders)
+skip the TCP + TLS handshake after the first one. Safe to share across
+threads; each send checks a connection out of the pool for its duration.
+
+Also home to the sent-alerts log that stops a reminder being sent twice.
+"""
+
+import http.client
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock on the sent-alerts log
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is the fallback
+    orjson = None
+
+log = logging.getLogger(__name__)
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+TELEGRAM_HOST = "api.telegram.org"
+# Raised when a pooled keep-alive connection was closed by the server before
+# it sent anything back; only these are safe to retry on a fresh connection
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError,
+)
+MAX_SENDS_PER_SECOND = 25   # Telegram caps bots at ~30 messages/second
+
+
+class TelegramClient:
+    """Pooled HTTPS connections to the Telegram Bot API."""
+
+    def __init__(self, pool_size: int = 4, timeout: float = 10.0):
+        self.timeout = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._rate_lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _checkout(self) -> http.client.HTTPSConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPSConnection(TELEGRAM_HOST, timeout=self.timeout)
+
+    def _checkin(self, conn: http.client.HTTPSConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _throttle(self) -> None:
+        """Space sends at least 1 / MAX_SENDS_PER_SECOND apart across all threads."""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1 / MAX_SENDS_PER_SECOND
+        if wait > 0:
+            time.sleep(wait)
+
+    def send_message(
+        self, token: str, chat_id: str, text: str, parse_mode: str = "Markdown"
+    ) -> tuple[bool, str]:
+        """
+        Send one message. Returns (ok, error description). A pooled connection
+        the server had already closed is retried once on a fresh connection;
+        any other failure is not, since the message may have been delivered.
+        """
+        path = f"/bot{token.strip()}/sendMessage"
+        body = _dumps({"chat_id": chat_id.strip(), "text": text, "parse_mode": parse_mode})
+
+        self._throttle()
+        for attempt in range(2):
+            conn = self._checkout()
+            reused = conn.sock is not None
+            try:
+                conn.request("POST", path, body=body,
+                             headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS as exc:
+                # No response bytes arrived: a keep-alive socket the server had
+                # already closed, so the message can't have been delivered.
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                log.warning(f"Telegram send failed: {exc}")
+                return False, str(exc)
+            except (http.client.HTTPException, OSError) as exc:
+                # E.g. a read timeout: Telegram may have delivered it, so a
+                # retry could send the reminder twice.
+                conn.close()
+                log.warning(f"Telegram send failed: {exc}")
+                return False, str(exc)
+            try:
+                data = resp.read()
+            except (http.client.HTTPException, OSError) as exc:
+                conn.close()
+                log.warning(f"Telegram send failed: {exc}")
+                return False, str(exc)
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(conn)
+            # The body is always read in full so the connection can be reused,
+            # but a success only needs its prefix checked; errors are decoded
+            # for their description.
+            if resp.status == 200 and data.startswith(b'{"ok":true'):
+                return True, ""
+            try:
+                result = _loads(data)
+            except ValueError:
+                return False, f"HTTP {resp.status}"
+            if result.get("ok"):
+                return True, ""
+            return False, result.get("description", "Unknown error")
+
+        return False, "Unknown error"
+
+    def send_many(self, token: str, chat_id: str, texts: list[str]) -> list[tuple[bool, str]]:
+        """
+        Send several messages concurrently, one worker per pooled connection.
+        Results are returned in the order of `texts`; delivery order is not
+        guaranteed. A single message is sent inline, without a thread pool.
+        """
+        if not texts:
+            return []
+        if len(texts) == 1:
+            return [self.send_message(token, chat_id, texts[0])]
+        with ThreadPoolExecutor(max_workers=min(self._pool.maxsize, len(texts))) as pool:
+            return list(pool.map(lambda text: self.send_message(token, chat_id, text), texts))
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# ── Sent-alerts log ────────────────────────────────────────────────────────────
+# One {"key", "date"} JSON object per line. Sending a reminder appends a line
+# instead of rewriting the whole history.
+def alert_key(renewal, merchant: str, days: int) -> int:
+    """
+    Dedup key for one reminder, packed into a single int:
+    crc32(merchant) << 32 | days_until << 24 | renewal date ordinal.
+    `renewal` is the report's renewal_ordinal, or an ISO date for reports
+    written before that field existed.
+    """
+    ordinal = renewal if isinstance(renewal, int) else date.fromisoformat(renewal).toordinal()
+    return (zlib.crc32(merchant.encode()) << 32) | (days << 24) | ordinal
+
+
+def _packed(key) -> int:
+    """Convert a legacy "<renewal_date>_<merchant>_<days>" key; ints pass through."""
+    if isinstance(key, int):
+        return key
+    renewal_date, rest = key.split("_", 1)
+    merchant, days = rest.rsplit("_", 1)
+    return alert_key(renewal_date, merchant, int(days))
+
+
+def load_sent_alerts(path: Path, keep_days: int) -> dict[int, str]:
+    """
+    Read the log into {alert key: ISO date sent}, dropping entries older than
+    `keep_days`. A legacy sent_alerts.json dict beside it is migrated on first
+    use, and the log is rewritten once expired lines outnumber live ones.
+    """
+    cutoff = (date.today() - timedelta(days=keep_days)).isoformat()
+    sent: dict[int, str] = {}
+    lines = 0
+
+    legacy = path.with_suffix(".json")
+    if not path.exists() and legacy.exists():
+        try:
+            entries = _loads(legacy.read_bytes()).items()
+        except (OSError, ValueError, AttributeError):
+            return sent  # unreadable: leave it in place rather than lose it
+        for k, d in entries:
+            try:
+                if d >= cutoff:
+                    sent[_packed(k)] = d
+            except (ValueError, TypeError):
+                continue  # one malformed key doesn't sink the rest
+        _rewrite_sent_alerts(path, sent)
+        legacy.unlink()  # only once the migrated log is safely in place
+        return sent
+
+    if not path.exists():
+        return sent
+    with path.open("rb") as f:
+        for line in f:
+            lines += 1
+            try:
+                entry = _loads(line)
+                if entry["date"] >= cutoff:
+                    sent[_packed(entry["key"])] = entry["date"]
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    if lines > 2 * len(sent):
+        _rewrite_sent_alerts(path, sent)
+    return sent
+
+
+@contextmanager
+def sent_alerts_lock(path: Path) -> Iterator[None]:
+    """
+    Exclusive cross-process lock for load_sent_alerts → send → append_sent_alerts,
+    so the app's reminder thread and scheduler.py can't both send a reminder
+    neither has recorded yet.
+    """
+    if fcntl is None:
+        yield
+        return
+    with path.with_name(f"{path.name}.lock").open("a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def append_sent_alerts(path: Path, entries: dict[int, str]) -> None:
+    """Record newly sent alerts: {alert key: ISO date sent}."""
+    if entries:
+        with path.open("ab") as f:
+            f.writelines(_dumps({"key": k, "date": d}) + b"\n" for k, d in entries.items())
+
+
+def _rewrite_sent_alerts(path: Path, sent: dict[int, str]) -> None:
+    tmp = path.with_name(f"{path.name}.tmp")
+    with tmp.open("wb") as f:
+        f.writelines(_dumps({"key": k, "date": d}) + b"\n" for k, d in sent.items())
+    os.replace(tmp, path)
@@ -19,11 +19,19 @@ import os
 import time
 import hashlib
 import logging
+import mmap
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from email.header import decode_header
+from email.parser import BytesParser
+from email.policy import compat32
 from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from dotenv import load_dotenv
 
@@ -86,8 +94,25 @@ CANCELLATION_SIGNALS = [
     "your account has been closed", "service has been cancelled",
 ]
 
+
+
+# Each phrase list compiled to one literal alternation, so a single regex scan
+# replaces one substring test per phrase
+def _phrase_re(phrases: list[str]) -> re.Pattern:
+    return re.compile("|".join(map(re.escape, phrases)))
+
+
+_KEYWORD_RE = _phrase_re(SEARCH_KEYWORDS)
+_SUBSCRIPTION_RE = _phrase_re(SUBSCRIPTION_SIGNALS)
+_EXCLUSION_RE = _phrase_re(EXCLUSION_SIGNALS)
+_CANCELLATION_RE = _phrase_re(CANCELLATION_SIGNALS)
+
 OUTPUT_FILE = Path("subscriptions.jsonl")
 LOOKBACK_DAYS = 60            # 2 months
+FETCH_BATCH_SIZE = 50         # messages per IMAP FETCH round-trip
+HEADER_FETCH_ITEM = "(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM DATE)])"
+IMAP_WORKERS = 4              # parallel IMAP connections (Gmail allows ~15)
+FLUSH_EVERY = 50              # records buffered between output-file flushes
 
 
 # ── Credential loading ───────────────────────────────────────────────────────
@@ -114,26 +139,200 @@ def connect_imap(email_addr: str, app_password: str) -> imaplib.IMAP4_SSL:
     return mail
 
 
+def iter_fetched_messages(msg_data: list) -> Iterator[tuple[str, bytes]]:
+    """
+    Yield (message number, raw bytes) pairs from an imaplib FETCH response.
+    Each message arrives as a (b"<num> (UID <uid> BODY[] {size}", raw) tuple
+    followed by a closing b")" line; even a UID FETCH leads with the sequence
+    number, which record ids are derived from. Closing lines, NIL bodies and
+    unsolicited untagged responses (e.g. FLAGS updates) come back as plain
+    bytes and are skipped.
+    """
+    for part in msg_data or []:
+        if not isinstance(part, tuple) or not part[1]:
+            continue
+        num = part[0].split(None, 1)[0]
+        if num.isdigit():
+            yield num.decode(), part[1]
+
+
+_FETCHED_UID_RE = re.compile(rb"\bUID (\d+)")
+
+
+def screen_header_batch(batch: list[bytes], hdr_data: list) -> tuple[list[bytes], int]:
+    """
+    Apply the Subject/From pre-filter to the HEADER.FIELDS UID FETCH response
+    for `batch`. Returns (UIDs worth fetching in full, number of emails
+    rejected). Headers that fail to parse are kept so parse_email can make the
+    call, as is any requested UID whose response entry couldn't be matched to
+    it (e.g. a server that puts the UID after the literal) — otherwise the
+    watermark would move past it unfetched.
+    """
+    survivors, rejected = [], 0
+    screened: set[int] = set()
+    for part in hdr_data or []:
+        if not isinstance(part, tuple) or not part[1]:
+            continue
+        m = _FETCHED_UID_RE.search(part[0])
+        if not m:
+            continue
+        screened.add(int(m.group(1)))
+        try:
+            headers = _HEADER_PARSER.parsebytes(part[1], headersonly=True)
+            keep = header_has_signal(decode_mime_words(headers.get("Subject", "")),
+                                     headers.get("From", ""))
+        except Exception:
+            keep = True
+        if keep:
+            survivors.append(m.group(1))
+        else:
+            rejected += 1
+    survivors.extend(uid for uid in batch if int(uid) not in screened)
+    return survivors, rejected
+
+
+_WORKER_DONE = object()    # queue sentinel pushed by each fetch worker on exit
+
+
+def fetch_worker(
+    email_addr: str,
+    app_password: str,
+    mailbox: str,
+    batches: list[list[bytes]],
+    out_q: queue.Queue,
+    stop: threading.Event,
+    known_ids: Optional[set] = None,
+) -> None:
+    """
+    Fetch and parse a shard of UID batches on a dedicated IMAP connection,
+    pushing each parse result (record or None) onto out_q. Each batch is
+    screened on a headers-only FETCH before any full message is downloaded.
+    `known_ids` is passed through to parse_email for legacy-id matching.
+    A failure is pushed as the exception itself; either way the worker
+    finishes by pushing _WORKER_DONE so the consumer can count workers out.
+    """
+    mail = None
+    try:
+        mail = connect_imap(email_addr, app_password)
+        mail.select(mailbox)
+        stats: Counter = Counter()
+        for batch in batches:
+            if stop.is_set():
+                break
+            # Headers first; full bodies only for emails that pass the pre-filter
+            typ, hdr_data = mail.uid("FETCH", b",".join(batch).decode(), HEADER_FETCH_ITEM)
+            if typ != "OK":
+                raise imaplib.IMAP4.error(f"Header FETCH failed: {hdr_data}")
+            survivors, rejected = screen_header_batch(batch, hdr_data)
+            stats["header_rejected"] += rejected
+            for _ in range(rejected):
+                out_q.put(None)
+            if not survivors:
+                continue
+            # BODY.PEEK[] returns the full message without setting \Seen
+            typ, msg_data = mail.uid("FETCH", b",".join(survivors).decode(), "(BODY.PEEK[])")
+            if typ != "OK":
+                raise imaplib.IMAP4.error(f"Message FETCH failed: {msg_data}")
+            for uid_str, raw_bytes in iter_fetched_messages(msg_data):
+                out_q.put(parse_email(raw_bytes, uid_str, stats, known_ids))
+        log.info(f"Header pre-filter rejected {stats['header_rejected']} "
+                 f"of {sum(stats.values())} emails.")
+    except Exception as exc:
+        log.warning(f"IMAP fetch worker failed: {exc}")
+        out_q.put(exc)
+    finally:
+        out_q.put(_WORKER_DONE)
+        if mail is not None:
+            try:
+                mail.logout()
+            except Exception:
+                pass
+
+
+def uid_watermark_path(path: Path) -> Path:
+    """Path of the last-fetched-UID watermark kept alongside a JSONL output file."""
+    return path.with_suffix(".last_uid")
+
+
+def load_uid_watermark(
+    path: Path, email_addr: str, mailbox: str, uidvalidity: Optional[str]
+) -> int:
+    """
+    Highest UID already fetched from `mailbox`, or 0 to scan the full window.
+    The watermark only counts for the same account, mailbox and UIDVALIDITY,
+    and only while the JSONL it was recorded against still exists.
+    """
+    wm_path = uid_watermark_path(path)
+    if not path.exists():
+        wm_path.unlink(missing_ok=True)  # left over from a deleted history
+        return 0
+    if not uidvalidity or not wm_path.exists():
+        return 0
+    try:
+        wm = json.loads(wm_path.read_text())
+    except (OSError, ValueError):
+        return 0
+    if (wm.get("email_addr") != email_addr.lower() or wm.get("mailbox") != mailbox
+            or wm.get("uidvalidity") != uidvalidity):
+        return 0
+    return int(wm.get("last_uid", 0))
+
+
+def save_uid_watermark(
+    path: Path, email_addr: str, mailbox: str, uidvalidity: str, last_uid: int
+) -> None:
+    uid_watermark_path(path).write_text(json.dumps({
+        "email_addr": email_addr.lower(), "mailbox": mailbox,
+        "uidvalidity": uidvalidity, "last_uid": last_uid,
+    }))
+
+
+def flush_outputs(out_f, ids_f) -> None:
+    """Flush the JSONL before its id sidecar so no id lands ahead of its record."""
+    out_f.flush()
+    ids_f.flush()
+
+
 # ── Resume support ────────────────────────────────────────────────────────────
-def load_parsed_ids() -> set[str]:
-    """Return set of already-parsed email IDs from the JSONL output file."""
-    parsed = set()
-    if OUTPUT_FILE.exists():
-        with OUTPUT_FILE.open() as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        record = json.loads(line)
-                        parsed.add(record["id"])
-                    except (json.JSONDecodeError, KeyError):
-                        pass
+# JSON-escaped string values cannot contain a bare `"id":`, so this only ever
+# hits a record's own key
+_ID_RE = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+
+
+def ids_sidecar(path: Path) -> Path:
+    """Path of the one-id-per-line file kept alongside a JSONL output file."""
+    return path.with_suffix(".ids")
+
+
+def load_parsed_ids(path: Path = OUTPUT_FILE) -> set[str]:
+    """
+    Return set of already-parsed email IDs from a JSONL output file.
+    Reads the .ids sidecar when it is at least as new as the JSONL; otherwise
+    maps the JSONL, regex-scans it in one pass and rewrites the sidecar.
+    """
+    ids_path = ids_sidecar(path)
+    if not path.exists() or path.stat().st_size == 0:
+        ids_path.unlink(missing_ok=True)  # left over from a deleted history
+        return set()
+    if ids_path.exists() and ids_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+        return set(ids_path.read_text().split())
+
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        parsed = {m.group(1).decode() for m in _ID_RE.finditer(mm)}
+    ids_path.write_text("".join(f"{rid}\n" for rid in parsed))
     return parsed
 
 
 # ── Text helpers ─────────────────────────────────────────────────────────────
 def decode_mime_words(s: str) -> str:
     """Decode MIME-encoded header words to a plain string."""
+    if isinstance(s, str):
+        return _decode_mime_cached(s)
+    # compat32 returns (unhashable) Header objects for raw 8-bit headers
+    return _decode_mime(s)
+
+
+def _decode_mime(s) -> str:
     parts = decode_header(s)
     decoded = []
     for part, charset in parts:
@@ -144,34 +343,57 @@ def decode_mime_words(s: str) -> str:
     return "".join(decoded)
 
 
+# Notification subjects recur verbatim across a mailbox
+_decode_mime_cached = lru_cache(maxsize=2048)(_decode_mime)
+
+
+# Non-visible blocks are removed wholesale before tags are stripped, so their
+# CSS/JS text never reaches the snippet or the keyword scans
+_HTML_DROP_RE = re.compile(
+    r"<(head|script|style|title)\b.*?</\1\s*>|<!--.*?-->|<!\[CDATA\[.*?\]\]>",
+    re.IGNORECASE | re.DOTALL,
+)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def html_to_text(raw: str) -> str:
+    """Reduce an HTML body to its visible text on a single line."""
+    text = _HTML_TAG_RE.sub(" ", _HTML_DROP_RE.sub(" ", raw))
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
 def extract_body_snippet(msg: email.message.Message, max_chars: int = 500) -> str:
     """Extract a short plain-text snippet from the email body."""
     snippet = ""
     if msg.is_multipart():
+        # One walk: stop at the first text/plain body, remembering HTML parts
+        # on the way so the fallback doesn't re-walk the tree
+        html_parts = []
         for part in msg.walk():
+            if part.get_content_maintype() == "multipart":
+                continue
             ctype = part.get_content_type()
-            disp = str(part.get("Content-Disposition", ""))
-            if ctype == "text/plain" and "attachment" not in disp:
+            if ctype == "text/plain" and "attachment" not in str(part.get("Content-Disposition", "")):
                 payload = part.get_payload(decode=True)
                 if payload:
                     snippet = payload.decode(errors="replace")
                     break
+            elif ctype == "text/html":
+                html_parts.append(part)
         # Fall back to HTML part if no plain-text found
         if not snippet:
-            for part in msg.walk():
-                ctype = part.get_content_type()
-                if ctype == "text/html":
-                    payload = part.get_payload(decode=True)
-                    if payload:
-                        raw = payload.decode(errors="replace")
-                        # Strip HTML tags crudely
-                        snippet = re.sub(r"<[^>]+>", " ", raw)
-                        snippet = re.sub(r"\s+", " ", snippet).strip()
-                        break
+            for part in html_parts:
+                payload = part.get_payload(decode=True)
+                if payload:
+                    snippet = html_to_text(payload.decode(errors="replace"))
+                    break
     else:
         payload = msg.get_payload(decode=True)
         if payload:
             snippet = payload.decode(errors="replace")
+            if msg.get_content_type() == "text/html":
+                snippet = html_to_text(snippet)
 
     return snippet[:max_chars].strip()
 
@@ -198,10 +420,15 @@ AMOUNT_PATTERNS = [
     r"charged[:\s]+\$?\s?([\d,]+(?:\.\d{2})?)",
 ]
 
+# Compiled once at import with IGNORECASE baked in, instead of going through
+# re's pattern cache on every call
+_AMOUNT_RES = [re.compile(p, re.IGNORECASE) for p in AMOUNT_PATTERNS]
+
+
 def extract_amount(text: str) -> Optional[float]:
     """Return the first plausible dollar amount found in `text`."""
-    for pattern in AMOUNT_PATTERNS:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _AMOUNT_RES:
+        match = pattern.search(text)
         if match:
             raw = match.group(1).replace(",", "")
             try:
@@ -213,22 +440,25 @@ def extract_amount(text: str) -> Optional[float]:
     return None
 
 
+_CURRENCY_RES = [
+    ("NGN", re.compile(r"₦|\bNGN\b|naira", re.IGNORECASE)),
+    ("GBP", re.compile(r"£|\bGBP\b")),
+    ("EUR", re.compile(r"€|\bEUR\b")),
+    ("JPY", re.compile(r"¥|\bJPY\b|\bCNY\b")),
+    ("CAD", re.compile(r"\bCAD\b")),
+]
+
+
 def extract_currency(text: str) -> str:
     """Detect currency symbol/code; defaults to USD."""
-    if re.search(r"₦|\bNGN\b|naira", text, re.IGNORECASE):
-        return "NGN"
-    if re.search(r"£|\bGBP\b", text):
-        return "GBP"
-    if re.search(r"€|\bEUR\b", text):
-        return "EUR"
-    if re.search(r"¥|\bJPY\b|\bCNY\b", text):
-        return "JPY"
-    if re.search(r"\bCAD\b", text):
-        return "CAD"
+    for code, pattern in _CURRENCY_RES:
+        if pattern.search(text):
+            return code
     return "USD"
 
 
 # ── Merchant extraction ───────────────────────────────────────────────────────
+@lru_cache(maxsize=4096)  # one entry per distinct sender; From headers repeat heavily
 def extract_merchant(from_header: str) -> str:
     """
     Derive a clean merchant name from the From header.
@@ -257,22 +487,66 @@ def extract_merchant(from_header: str) -> str:
 # ── Keyword detection ─────────────────────────────────────────────────────────
 def detected_keywords(subject: str, body: str) -> list[str]:
     """Return which SEARCH_KEYWORDS appear in the subject or body."""
-    combined = (subject + " " + body).lower()
-    return [kw for kw in SEARCH_KEYWORDS if kw in combined]
+    hits = set(_KEYWORD_RE.findall((subject + " " + body).lower()))
+    return [kw for kw in SEARCH_KEYWORDS if kw in hits]
 
 
 # ── Core parsing logic ────────────────────────────────────────────────────────
-def parse_email(raw_bytes: bytes, uid: str) -> Optional[dict]:
+_HEADER_PARSER = BytesParser(policy=compat32)
+
+
+def header_has_signal(subject: str, from_header: str) -> bool:
+    """True if Subject/From mention a search keyword or any signal phrase."""
+    text = f"{subject} {from_header}".lower()
+    return any(
+        pattern.search(text)
+        for pattern in (_KEYWORD_RE, _SUBSCRIPTION_RE, _CANCELLATION_RE)
+    )
+
+
+def record_id(uid: str, from_header: str, known_ids: Optional[set] = None) -> str:
+    """
+    Stable 16-hex-char id for an email. Histories written before the switch
+    to BLAKE2b hold truncated SHA-256 ids; if `known_ids` contains the legacy
+    id for this email, that id is returned so resume dedup still matches.
+    """
+    key = f"{uid}:{from_header}".encode()
+    rid = hashlib.blake2b(key, digest_size=8).hexdigest()
+    if known_ids and rid not in known_ids:
+        legacy = hashlib.sha256(key).hexdigest()[:16]
+        if legacy in known_ids:
+            return legacy
+    return rid
+
+
+def parse_email(
+    raw_bytes: bytes,
+    uid: str,
+    stats: Optional[Counter] = None,
+    known_ids: Optional[set] = None,
+) -> Optional[dict]:
     """
     Parse a raw email byte-string into a subscription record dict.
     Returns None if parsing fails or no amount could be extracted.
+    Emails whose headers carry no keyword or signal are rejected before the
+    body is decoded; pass a Counter as `stats` to tally pre-filter outcomes
+    and the already-parsed id set as `known_ids` (see record_id).
     """
     try:
-        msg = email.message_from_bytes(raw_bytes)
+        # Headers only for the pre-filter; the MIME tree is built for survivors
+        headers = _HEADER_PARSER.parsebytes(raw_bytes, headersonly=True)
+
+        subject = decode_mime_words(headers.get("Subject", ""))
+        from_header = headers.get("From", "")
+
+        if not header_has_signal(subject, from_header):
+            if stats is not None:
+                stats["header_rejected"] += 1
+            return None
+        if stats is not None:
+            stats["header_passed"] += 1
 
-        subject = decode_mime_words(msg.get("Subject", ""))
-        from_header = msg.get("From", "")
-        date_header = msg.get("Date", "")
+        date_header = headers.get("Date", "")
 
         # Parse date
         try:
@@ -281,7 +555,7 @@ def parse_email(raw_bytes: bytes, uid: str) -> Optional[dict]:
         except Exception:
             date_str = datetime.now().strftime("%Y-%m-%d")
 
-        body = extract_body_snippet(msg)
+        body = extract_body_snippet(email.message_from_bytes(raw_bytes))
         combined_text = f"{subject} {body}"
 
         amount = extract_amount(combined_text)
@@ -293,25 +567,21 @@ def parse_email(raw_bytes: bytes, uid: str) -> Optional[dict]:
         combined_lower = combined_text.lower()
 
         # Check cancellation first — save even without amount
-        is_cancelled = any(sig in combined_lower for sig in CANCELLATION_SIGNALS)
+        is_cancelled = _CANCELLATION_RE.search(combined_lower) is not None
 
         if not is_cancelled:
             # Active subscription: must have positive amount + subscription signal
             if not amount or amount <= 0:
                 return None
-            has_signal = any(sig in combined_lower for sig in SUBSCRIPTION_SIGNALS)
-            if not has_signal:
+            if not _SUBSCRIPTION_RE.search(combined_lower):
                 return None
-            if any(excl in combined_lower for excl in EXCLUSION_SIGNALS):
+            if _EXCLUSION_RE.search(combined_lower):
                 return None
 
         status = "cancelled" if is_cancelled else "active"
 
-        # Generate stable ID from uid + from header
-        record_id = hashlib.sha256(f"{uid}:{from_header}".encode()).hexdigest()[:16]
-
         return {
-            "id": record_id,
+            "id": record_id(uid, from_header, known_ids),
             "merchant": merchant,
             "amount": amount,
             "currency": currency,
@@ -328,11 +598,39 @@ def parse_email(raw_bytes: bytes, uid: str) -> Optional[dict]:
 
 
 # ── Main parser ───────────────────────────────────────────────────────────────
+def selected_uidvalidity(mail: imaplib.IMAP4) -> Optional[str]:
+    """UIDVALIDITY reported when the current mailbox was selected."""
+    _, data = mail.response("UIDVALIDITY")
+    return data[0].decode() if data and data[0] else None
+
+
+def uid_range(last_uid: int) -> tuple[str, ...]:
+    """UID SEARCH criteria limiting results to UIDs above `last_uid`."""
+    return ("UID", f"{last_uid + 1}:*") if last_uid else ()
+
+
+def gmail_raw_query(since: str) -> str:
+    """X-GM-RAW query: Subscriptions category or any SEARCH_KEYWORD in the subject."""
+    keywords = " OR ".join(SEARCH_KEYWORDS)
+    return f"(category:subscriptions OR subject:({keywords})) after:{since}"
+
+
+def imap_subject_any(keywords: list[str]) -> str:
+    """
+    Standard IMAP criteria matching any keyword in the subject. OR is a
+    binary prefix operator, so n terms need n - 1 leading ORs.
+    """
+    terms = " ".join(f'SUBJECT "{kw}"' for kw in keywords)
+    return "OR " * (len(keywords) - 1) + terms
+
+
 def run_parser(
     email_addr: str,
     app_password: str,
     progress_callback=None,
     output_file: str = None,
+    batch_size: int = FETCH_BATCH_SIZE,
+    workers: int = IMAP_WORKERS,
 ) -> list[dict]:
     """
     Connect to Gmail, search for subscription-related emails, parse, and
@@ -342,6 +640,8 @@ def run_parser(
         email_addr:        Gmail address.
         app_password:      Gmail app password.
         progress_callback: Optional callable(current, total, record) for UI updates.
+        batch_size:        Messages requested per FETCH command.
+        workers:           Parallel IMAP connections used for fetching.
 
     Returns:
         List of newly parsed subscription records.
@@ -349,84 +649,122 @@ def run_parser(
     out_path = Path(output_file) if output_file else OUTPUT_FILE
     mail = connect_imap(email_addr, app_password)
 
-    # ── Target Gmail's Subscriptions category first (much smaller set) ────────
+    # ── One Gmail search: Subscriptions category OR a keyword in the subject ──
+    # Searches return UIDs, restricted to those above the watermark left by
+    # the previous complete run, so repeat scans only fetch new mail.
     since_gmail = (datetime.now() - timedelta(days=LOOKBACK_DAYS)).strftime("%Y/%m/%d")
     since_imap  = (datetime.now() - timedelta(days=LOOKBACK_DAYS)).strftime("%d-%b-%Y")
     all_uids = []
+    mailbox = '"[Gmail]/All Mail"'
+    uidvalidity = None
+    last_uid = 0
+    gmail_search_ok = False
 
     try:
-        status, _ = mail.select('"[Gmail]/All Mail"')
+        status, _ = mail.select(mailbox)
         if status == "OK":
-            _, data = mail.search(None, "X-GM-RAW",
-                                  f'"category:subscriptions after:{since_gmail}"')
-            all_uids = data[0].split() if data[0] else []
-            log.info(f"Gmail Subscriptions category: {len(all_uids)} emails found.")
+            uidvalidity = selected_uidvalidity(mail)
+            last_uid = load_uid_watermark(out_path, email_addr, mailbox, uidvalidity)
+            status, data = mail.uid("SEARCH", *uid_range(last_uid),
+                                    "X-GM-RAW", f'"{gmail_raw_query(since_gmail)}"')
+            if status == "OK":
+                gmail_search_ok = True
+                all_uids = data[0].split() if data[0] else []
     except Exception as exc:
         log.warning(f"X-GM-RAW search failed ({exc}), falling back to INBOX keyword search.")
 
-    # ── Fallback: INBOX + IMAP subject-keyword search ─────────────────────────
-    if not all_uids:
-        mail.select("INBOX")
-        combined_uids: set[bytes] = set()
-        for kw in SEARCH_KEYWORDS:
-            try:
-                _, data = mail.search(None, f'(SINCE "{since_imap}" SUBJECT "{kw}")')
-                if data[0]:
-                    combined_uids.update(data[0].split())
-            except Exception:
-                pass
-        all_uids = list(combined_uids)
-        log.info(f"INBOX keyword search: {len(all_uids)} candidate emails.")
+    # ── Fallback (non-Gmail servers): INBOX + one OR'd subject search ─────────
+    if not gmail_search_ok:
+        mailbox = "INBOX"
+        mail.select(mailbox)
+        uidvalidity = selected_uidvalidity(mail)
+        last_uid = load_uid_watermark(out_path, email_addr, mailbox, uidvalidity)
+        try:
+            _, data = mail.uid("SEARCH", *uid_range(last_uid),
+                               f'(SINCE "{since_imap}" {imap_subject_any(SEARCH_KEYWORDS)})')
+            all_uids = data[0].split() if data[0] else []
+        except Exception as exc:
+            log.warning(f"INBOX keyword search failed: {exc}")
+
+    # "n:*" always matches the newest message, even when its UID is below n
+    all_uids = [u for u in all_uids if int(u) > last_uid]
+    log.info(f"{mailbox} search: {len(all_uids)} candidate emails above UID {last_uid}.")
 
     # Load already-parsed IDs from the user-specific output file
-    already_parsed: set = set()
-    if out_path.exists():
-        with out_path.open() as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        already_parsed.add(json.loads(line)["id"])
-                    except (json.JSONDecodeError, KeyError):
-                        pass
+    already_parsed = load_parsed_ids(out_path)
     log.info(f"Resuming: {len(already_parsed)} already parsed, skipping them.")
 
+    # Searching is done; each fetch worker opens its own connection
+    mail.logout()
+
     new_records: list[dict] = []
     processed = 0
 
-    with out_path.open("a") as out_f:
-        for i, uid in enumerate(all_uids):
-            uid_str = uid.decode() if isinstance(uid, bytes) else uid
+    total = len(all_uids)
+    batches = [all_uids[i:i + batch_size] for i in range(0, total, batch_size)]
+    workers = min(workers, len(batches))
+    out_q: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    fetch_error: Optional[Exception] = None
+
+    # Round-robin the batches across one IMAP connection per worker; this
+    # thread is the only one that touches the output file.
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool, \
+            out_path.open("a") as out_f, ids_sidecar(out_path).open("a") as ids_f:
+        # Legacy SHA-256 ids can only match mail parsed before the watermark
+        # existed; once a watermarked run has happened, old mail is never
+        # re-fetched, so skip the second hash per email.
+        legacy_ids = already_parsed if last_uid == 0 else None
+        for k in range(workers):
+            pool.submit(fetch_worker, email_addr, app_password, mailbox,
+                        batches[k::workers], out_q, stop, legacy_ids)
 
-            # Fetch full email
-            _, msg_data = mail.fetch(uid, "(RFC822)")
-            if not msg_data or msg_data[0] is None:
-                continue
-            raw_bytes = msg_data[0][1] if isinstance(msg_data[0], tuple) else None
-            if not raw_bytes:
-                continue
-
-            record = parse_email(raw_bytes, uid_str)
-            if record is None:
-                continue
+        try:
+            n = 0
+            running = workers
+            while running:
+                record = out_q.get()
+                if record is _WORKER_DONE:
+                    running -= 1
+                    continue
+                if isinstance(record, Exception):
+                    fetch_error = fetch_error or record
+                    continue
+                n += 1
+                if record is None:
+                    continue
+
+                if record["id"] in already_parsed:
+                    if progress_callback:
+                        progress_callback(n, total, record)
+                    continue
+
+                already_parsed.add(record["id"])
+                new_records.append(record)
+                out_f.write(json.dumps(record) + "\n")
+                ids_f.write(record["id"] + "\n")
+                processed += 1
+                if processed % FLUSH_EVERY == 0:
+                    flush_outputs(out_f, ids_f)
+
+                log.info(f"[{processed}] {record['merchant']} | {record['currency']} {record['amount']} | {record['date']}")
 
-            if record["id"] in already_parsed:
                 if progress_callback:
-                    progress_callback(i + 1, len(all_uids), record)
-                continue
+                    progress_callback(n, total, record)
+        finally:
+            stop.set()
+            flush_outputs(out_f, ids_f)
 
-            already_parsed.add(record["id"])
-            new_records.append(record)
-            out_f.write(json.dumps(record) + "\n")
-            out_f.flush()
-            processed += 1
+    # Records parsed before the failure are kept; the error still reaches the
+    # caller, and the watermark stays put so the next run retries the batch
+    if fetch_error is not None:
+        raise fetch_error
 
-            log.info(f"[{processed}] {record['merchant']} | {record['currency']} {record['amount']} | {record['date']}")
+    # Only advance the watermark once every candidate has been fetched
+    if all_uids and uidvalidity:
+        save_uid_watermark(out_path, email_addr, mailbox, uidvalidity,
+                           max(int(u) for u in all_uids))
 
-            if progress_callback:
-                progress_callback(i + 1, len(all_uids), record)
-
-    mail.logout()
     log.info(f"Done. Parsed {processed} new subscription emails → {out_path}")
     return new_records
 
@@ -473,55 +811,54 @@ def run_parser_oauth(
     log.info(f"Gmail API: {len(messages)} candidate messages.")
 
     out_path = Path(output_file) if output_file else OUTPUT_FILE
-    already_parsed: set = set()
-    if out_path.exists():
-        with out_path.open() as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        already_parsed.add(json.loads(line)["id"])
-                    except (json.JSONDecodeError, KeyError):
-                        pass
+    already_parsed = load_parsed_ids(out_path)
 
     new_records: list[dict] = []
     processed = 0
+    stats: Counter = Counter()
 
-    with out_path.open("a") as out_f:
-        for i, msg in enumerate(messages):
-            msg_id = msg["id"]
-            if msg_id in already_parsed:
-                if progress_callback:
-                    progress_callback(i + 1, len(messages), None)
-                continue
-
-            try:
-                full_msg = service.users().messages().get(
-                    userId="me", id=msg_id, format="raw"
-                ).execute()
-                raw_bytes = base64.urlsafe_b64decode(full_msg["raw"] + "==")
-            except Exception as exc:
-                log.warning(f"Failed to fetch message {msg_id}: {exc}")
-                if progress_callback:
-                    progress_callback(i + 1, len(messages), None)
-                continue
+    with out_path.open("a") as out_f, ids_sidecar(out_path).open("a") as ids_f:
+        try:
+            for i, msg in enumerate(messages):
+                msg_id = msg["id"]
+                if msg_id in already_parsed:
+                    if progress_callback:
+                        progress_callback(i + 1, len(messages), None)
+                    continue
+
+                try:
+                    full_msg = service.users().messages().get(
+                        userId="me", id=msg_id, format="raw"
+                    ).execute()
+                    raw_bytes = base64.urlsafe_b64decode(full_msg["raw"] + "==")
+                except Exception as exc:
+                    log.warning(f"Failed to fetch message {msg_id}: {exc}")
+                    if progress_callback:
+                        progress_callback(i + 1, len(messages), None)
+                    continue
+
+                record = parse_email(raw_bytes, msg_id, stats, already_parsed)
+                if record is None:
+                    if progress_callback:
+                        progress_callback(i + 1, len(messages), None)
+                    continue
+
+                already_parsed.add(msg_id)
+                new_records.append(record)
+                out_f.write(json.dumps(record) + "\n")
+                ids_f.write(record["id"] + "\n")
+                processed += 1
+                if processed % FLUSH_EVERY == 0:
+                    flush_outputs(out_f, ids_f)
+                log.info(f"[{processed}] {record['merchant']} | {record['currency']} {record['amount']}")
 
-            record = parse_email(raw_bytes, msg_id)
-            if record is None:
                 if progress_callback:
-                    progress_callback(i + 1, len(messages), None)
-                continue
-
-            already_parsed.add(msg_id)
-            new_records.append(record)
-            out_f.write(json.dumps(record) + "\n")
-            out_f.flush()
-            processed += 1
-            log.info(f"[{processed}] {record['merchant']} | {record['currency']} {record['amount']}")
-
-            if progress_callback:
-                progress_callback(i + 1, len(messages), record)
+                    progress_callback(i + 1, len(messages), record)
+        finally:
+            flush_outputs(out_f, ids_f)
 
+    log.info(f"Header pre-filter rejected {stats['header_rejected']} "
+             f"of {sum(stats.values())} emails.")
     log.info(f"Done. Parsed {processed} new emails → {out_path}")
     return new_records
 
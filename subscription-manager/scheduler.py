@@ -1,32 +1,40 @@
 """
 scheduler.py — SubTrack Scheduler
 
-Two operating modes:
-  --remind   Check existing report for 3/2/1-day renewal reminders only (no Gmail scan).
-             Run this DAILY so you never miss a reminder.
-  (default)  Full Gmail scan + analysis + Telegram digest.
-             Run this WEEKLY — scanning every day is overkill.
+Two jobs, each run once per invocation and then exit:
+  --remind-once  Check existing report for 3/2/1-day renewal reminders only (no Gmail scan).
+                 Run this DAILY so you never miss a reminder.
+  --once         Full Gmail scan + analysis + Telegram digest (the default).
+                 Run this WEEKLY — scanning every day is overkill.
 
-Recommended setup (two launchd plists):
-  1. Weekly scan   → every Monday 08:00  → python scheduler.py
-  2. Daily remind  → every day  09:00  → python scheduler.py --remind
+Recommended setup (two launchd plists — nothing stays resident between runs):
+  1. Weekly scan   → every Monday 08:00  → python scheduler.py --once
+  2. Daily remind  → every day  09:00  → python scheduler.py --remind-once
 
 Usage:
-    python scheduler.py           # run full scan now, then weekly on Mondays 08:00
-    python scheduler.py --remind  # check reminders now, then daily at 09:00
-    python scheduler.py --once    # full scan once, then exit
+    python scheduler.py --once                 # full scan once, then exit
+    python scheduler.py --remind-once          # check reminders once, then exit
+    python scheduler.py --daemon               # no launchd/cron: scan now, then weekly on Mondays 08:00
+    python scheduler.py --remind --daemon      # no launchd/cron: check now, then daily at 09:00
 """
 
 import json
 import logging
+import os
 import sys
 import time
-import urllib.request
 from datetime import date, datetime, timezone
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
-import schedule
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is the fallback
+    orjson = None
 
+# Configured before importing parser, whose own import-time basicConfig would
+# otherwise win and make this one a no-op
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -34,84 +42,141 @@ logging.basicConfig(
 )
 log = logging.getLogger(__name__)
 
+from analyzer import DATA_FILE, run_analysis
+from notifier import (
+    TelegramClient, alert_key, append_sent_alerts, load_sent_alerts, sent_alerts_lock,
+)
+from parser import run_parser
+
 ALERT_CONFIG_FILE = Path("alerts_config.json")
-SENT_ALERTS_FILE  = Path("sent_alerts.json")
-REMINDER_DAYS     = [3, 2, 1]
+SENT_ALERTS_FILE  = Path("sent_alerts.jsonl")
+LAST_REPORT_FILE  = Path("last_report.json")
+REMINDER_DAYS     = frozenset((3, 2, 1))
 CURRENCY_SYMBOLS  = {"USD": "$", "NGN": "₦", "GBP": "£", "EUR": "€"}
 
+# Keep-alive connections to api.telegram.org, shared by every send in the run
+TELEGRAM = TelegramClient()
+
+
+@lru_cache(maxsize=256)
+def _fmt_amount(currency: str, amount_cents: int) -> str:
+    """'$15.49' / 'CAD 15.49' — shared by the digest and the reminders."""
+    sym = CURRENCY_SYMBOLS.get(currency, currency + " ")
+    return f"{sym}{amount_cents / 100:,.2f}"
+
 
 # ── Config helpers ─────────────────────────────────────────────────────────────
 def load_config() -> dict:
     if ALERT_CONFIG_FILE.exists():
         try:
-            return json.loads(ALERT_CONFIG_FILE.read_text())
+            raw = ALERT_CONFIG_FILE.read_bytes()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
         except Exception:
             pass
     return {}
 
 def save_config(cfg: dict):
-    ALERT_CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
+    # Temp file + os.replace, so a crash mid-write can't corrupt the credentials
+    tmp = ALERT_CONFIG_FILE.with_suffix(f".json.{os.getpid()}.tmp")
+    tmp.write_bytes(
+        orjson.dumps(cfg, option=orjson.OPT_INDENT_2) if orjson is not None
+        else json.dumps(cfg, indent=2).encode()
+    )
+    os.replace(tmp, ALERT_CONFIG_FILE)
 
 
 # ── Telegram ───────────────────────────────────────────────────────────────────
 def send_telegram(token: str, chat_id: str, text: str) -> bool:
-    try:
-        token = token.strip(); chat_id = chat_id.strip()
-        url     = f"https://api.telegram.org/bot{token}/sendMessage"
-        payload = json.dumps({"chat_id": chat_id, "text": text, "parse_mode": "Markdown"}).encode()
-        req     = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return json.loads(resp.read()).get("ok", False)
-    except Exception as exc:
-        log.warning(f"Telegram send failed: {exc}")
-        return False
+    # One-off sends (e.g. the scan-failure notice) reuse TELEGRAM's pool too
+    ok, _ = TELEGRAM.send_message(token, chat_id, text)
+    return ok
 
 
-# ── Renewal reminders (fires every day it's run; dedup via sent_alerts.json) ──
-def fire_renewal_reminders(report: dict, token: str, chat_id: str) -> int:
+# ── Renewal reminders (fires every day it's run; dedup via sent_alerts.jsonl) ─
+def fire_renewal_reminders(report: dict, token: str, chat_id: str, digest: str = "") -> int:
     """
     Send a Telegram message for each renewal that is exactly 3, 2, or 1 day(s)
     away. Deduplication key = renewal_date + merchant + days_until, so each
-    (merchant, distance) pair is only messaged once per day.
+    (merchant, distance) pair is only messaged once per day. A `digest`, if
+    given, goes out in the same concurrent batch as the reminders.
     """
     renewals = report.get("upcoming_renewals_30d", [])
     today    = date.today()
-    sent: dict = {}
-    if SENT_ALERTS_FILE.exists():
-        try:
-            sent = json.loads(SENT_ALERTS_FILE.read_text())
-        except Exception:
-            pass
-
-    count = 0
-    for r in renewals:
-        days = r.get("days_until", 999)
-        if days not in REMINDER_DAYS:
-            continue
-        key = f"{r['renewal_date']}_{r['merchant']}_{days}"
-        if key in sent:
-            continue
-        day_word = "day" if days == 1 else "days"
-        sym = CURRENCY_SYMBOLS.get(r["currency"], r["currency"] + " ")
-        msg = (
-            f"\u23f0 *Renewal Reminder \u2014 SubTrack*\n\n"
-            f"*{r['merchant']}* renews in *{days} {day_word}* ({r['renewal_date']}).\n"
-            f"Amount: *{sym}{r['amount']:,.2f}*\n\n"
-            f"If you don\u2019t wish to continue, cancel now."
-        )
-        if send_telegram(token, chat_id, msg):
-            sent[key] = today.isoformat()
-            count += 1
-            log.info(f"Reminder sent: {r['merchant']} in {days}d")
-
-    if count:
-        SENT_ALERTS_FILE.write_text(json.dumps(sent, indent=2))
-    return count
+    with sent_alerts_lock(SENT_ALERTS_FILE):
+        sent = load_sent_alerts(SENT_ALERTS_FILE, keep_days=max(REMINDER_DAYS) + 1)
+
+        due: list[tuple[int, str, dict]] = []
+        for r in renewals:
+            days = r.get("days_until", 999)
+            if days not in REMINDER_DAYS:
+                continue
+            key = alert_key(r.get("renewal_ordinal", r["renewal_date"]), r["merchant"], days)
+            if key in sent:
+                continue
+            day_word = "day" if days == 1 else "days"
+            msg = (
+                f"\u23f0 *Renewal Reminder \u2014 SubTrack*\n\n"
+                f"*{r['merchant']}* renews in *{days} {day_word}* ({r['renewal_date']}).\n"
+                f"Amount: *{_fmt_amount(r['currency'], round(r['amount'] * 100))}*\n\n"
+                f"If you don\u2019t wish to continue, cancel now."
+            )
+            due.append((key, msg, r))
+
+        # Digest and due reminders go out concurrently; only the new keys are appended
+        lead    = [digest] if digest else []
+        results = TELEGRAM.send_many(token, chat_id, lead + [msg for _, msg, _ in due])
+        if digest and not results[0][0]:
+            log.warning(f"Digest send failed: {results[0][1]}")
+        results = results[len(lead):]
+        new_keys: dict[int, str] = {}
+        for (key, _, r), (ok, _) in zip(due, results):
+            if ok:
+                new_keys[key] = today.isoformat()
+                log.info(f"Reminder sent: {r['merchant']} in {r['days_until']}d")
+
+        append_sent_alerts(SENT_ALERTS_FILE, new_keys)
+    return len(new_keys)
+
+
+# ── Report cache ───────────────────────────────────────────────────────────────
+def data_file_signature() -> Optional[list[int]]:
+    """(st_mtime_ns, st_size) of subscriptions.jsonl, or None if it doesn't exist."""
+    try:
+        st = DATA_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def save_report(report: dict, source: Optional[list[int]]):
+    """Cache `report` with the day it was built and the data file it was built from."""
+    entry = {"analyzed_on": date.today().isoformat(), "data_file": source, "report": report}
+    tmp = LAST_REPORT_FILE.with_suffix(f".json.{os.getpid()}.tmp")
+    tmp.write_bytes(orjson.dumps(entry) if orjson is not None else json.dumps(entry).encode())
+    os.replace(tmp, LAST_REPORT_FILE)
+
+def load_report() -> dict:
+    """
+    Reuse last_report.json if it was built today from a subscriptions.jsonl
+    with the same mtime and size as now; otherwise re-run the analysis.
+    `days_until` is relative to the day of analysis, so a report from
+    yesterday is stale.
+    """
+    source = data_file_signature()
+    try:
+        raw   = LAST_REPORT_FILE.read_bytes()
+        entry = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        if entry["analyzed_on"] == date.today().isoformat() and entry["data_file"] == source:
+            return entry["report"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    report = run_analysis()
+    save_report(report, source)  # signature taken before the analysis read the file
+    return report
 
 
 # ── Reminder-only job (no Gmail scan) ─────────────────────────────────────────
 def run_reminders_only():
-    """Load the cached report and fire any due reminders — no Gmail login needed."""
+    """Load today's report and fire any due reminders — no Gmail login needed."""
     cfg        = load_config()
     tg_token   = cfg.get("telegram_token", "").strip()
     tg_chat_id = cfg.get("telegram_chat_id", "").strip()
@@ -119,8 +184,7 @@ def run_reminders_only():
         log.warning("No Telegram credentials configured — skipping reminders.")
         return
 
-    from analyzer import run_analysis
-    report  = run_analysis()
+    report   = load_report()
     reminded = fire_renewal_reminders(report, tg_token, tg_chat_id)
     log.info(f"Reminder check done — {reminded} reminder(s) sent.")
 
@@ -140,11 +204,11 @@ def run_full_scan():
 
     log.info("Starting weekly scan…")
     try:
-        from parser import run_parser
         new_records = run_parser(email_addr, app_password)
 
-        from analyzer import run_analysis
-        report = run_analysis()
+        # New records rewrite subscriptions.jsonl, which invalidates the cached
+        # report; with nothing new, a report from earlier today is reused as-is.
+        report = load_report()
 
         cfg["last_scan"] = datetime.now(timezone.utc).isoformat()
         save_config(cfg)
@@ -159,7 +223,7 @@ def run_full_scan():
             if spend:
                 lines.append(
                     "\ud83d\udcb3 Monthly: *"
-                    + " \u00b7 ".join(f"{CURRENCY_SYMBOLS.get(c,c)}{a:,.2f}" for c, a in spend.items())
+                    + " \u00b7 ".join(_fmt_amount(c, round(a * 100)) for c, a in spend.items())
                     + "*"
                 )
             if savings > 0:
@@ -173,10 +237,10 @@ def run_full_scan():
             if new_records:
                 lines.append(f"\n\ud83c\udd95 *{len(new_records)} new* email{'s' if len(new_records) != 1 else ''} detected")
 
-            send_telegram(tg_token, tg_chat_id, "\n".join(lines))
-
-            # Also fire any due reminders as part of weekly scan
-            reminded = fire_renewal_reminders(report, tg_token, tg_chat_id)
+            # Any due reminders go out alongside the digest, which can be
+            # skipped on quiet weeks via "quiet_when_unchanged" in the config
+            digest   = "\n".join(lines) if new_records or not cfg.get("quiet_when_unchanged") else ""
+            reminded = fire_renewal_reminders(report, tg_token, tg_chat_id, digest=digest)
             if reminded:
                 log.info(f"Sent {reminded} renewal reminder(s).")
 
@@ -194,28 +258,42 @@ def run_full_scan():
                 pass
 
 
-# ── Entry point ────────────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    args = sys.argv[1:]
-
-    if "--once" in args:
-        # Single full scan, then exit
-        run_full_scan()
+# ── Resident mode (only for machines without launchd / cron) ─────────────────
+def run_daemon(remind: bool):
+    """
+    Run the job now, then stay resident and re-run it on schedule, sleeping
+    until the next job is due rather than polling.
+    """
+    import schedule
 
-    elif "--remind" in args:
-        # Daily reminder-only loop (no Gmail scan)
+    if remind:
         log.info("Scheduling daily reminder check at 09:00…")
         schedule.every().day.at("09:00").do(run_reminders_only)
-        run_reminders_only()       # run immediately on first start
-        while True:
-            schedule.run_pending()
-            time.sleep(30)
-
+        run_reminders_only()
     else:
-        # Weekly full scan (Mondays 08:00) + run immediately
         log.info("Scheduling weekly scan (Mondays at 08:00)…")
         schedule.every().monday.at("08:00").do(run_full_scan)
-        run_full_scan()            # run immediately on first start
+        run_full_scan()
+
+    try:
         while True:
             schedule.run_pending()
-            time.sleep(30)
+            idle = schedule.idle_seconds()
+            time.sleep(idle if idle and idle > 0 else 60)
+    except KeyboardInterrupt:
+        log.info("Scheduler stopped.")
+
+
+# ── Entry point ────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    args   = sys.argv[1:]
+    remind = "--remind" in args or "--remind-once" in args
+
+    if "--daemon" in args:
+        run_daemon(remind)
+    elif remind:
+        # One reminder check, then exit (launchd / cron)
+        run_reminders_only()
+    else:
+        # One full scan, then exit (launchd / cron)
+        run_full_scan()
@@ -3,13 +3,22 @@ seed_test_data.py — writes realistic mock subscription data for testing.
 Run this to try the analyzer and dashboard without a Gmail connection.
 """
 import json
+import os
 from pathlib import Path
 from datetime import date, timedelta
 import hashlib, random
 
 OUTPUT = Path("subscriptions.jsonl")
 
-def make_records():
+# One JSONL row per record, filled in directly rather than via json.dumps(dict).
+# String fields marked %s must already be JSON-encoded (quoted and escaped).
+ROW_TEMPLATE = (
+    '{"id":"%s","merchant":%s,"amount":%.2f,"currency":"%s","date":"%s",'
+    '"subject":%s,"source_email":%s,"detected_keywords":[%s,"payment"],'
+    '"parsed_at":"%sT12:00:00+00:00"}\n'
+)
+
+def make_rows():
     today = date.today()
 
     subs = [
@@ -50,25 +59,28 @@ def make_records():
         ("Duolingo",    "hello@duolingo.com",           6.99, "USD", 30,  "subscription",   5),
     ]
 
-    records = []
+    rows = []
     for merchant, from_email, amount, currency, freq_days, keyword, months_back in subs:
         charge_date = today - timedelta(days=months_back * 30)
-        uid = f"{merchant}-{charge_date.isoformat()}"
-        record_id = hashlib.sha256(uid.encode()).hexdigest()[:16]
-        records.append({
-            "id": record_id,
-            "merchant": merchant,
-            "amount": amount,
-            "currency": currency,
-            "date": charge_date.isoformat(),
-            "subject": f"Your {merchant} {keyword} for {charge_date.strftime('%B %Y')}",
-            "source_email": f"Test User <{from_email}>",
-            "detected_keywords": [keyword, "payment"],
-            "parsed_at": f"{charge_date.isoformat()}T12:00:00+00:00",
-        })
-    return records
+        iso = charge_date.isoformat()
+        uid = f"{merchant}-{iso}"
+        rows.append(ROW_TEMPLATE % (
+            hashlib.blake2b(uid.encode(), digest_size=8).hexdigest(),
+            json.dumps(merchant),
+            amount,
+            currency,
+            iso,
+            json.dumps(f"Your {merchant} {keyword} for {charge_date.strftime('%B %Y')}"),
+            json.dumps(f"Test User <{from_email}>"),
+            json.dumps(keyword),
+            iso,
+        ))
+    return rows
 
 if __name__ == "__main__":
-    records = make_records()
-    OUTPUT.write_text("\n".join(json.dumps(r) for r in records) + "\n")
-    print(f"Wrote {len(records)} mock records to {OUTPUT}")
+    rows = make_rows()
+    tmp = OUTPUT.with_suffix(".jsonl.tmp")
+    with tmp.open("w") as f:
+        f.writelines(rows)
+    os.replace(tmp, OUTPUT)
+    print(f"Wrote {len(rows)} mock records to {OUTPUT}")